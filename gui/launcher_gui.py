@@ -1,19 +1,67 @@
 # CleanMedia/gui/launcher_gui.py
 
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
+from tkinter import scrolledtext, ttk
+import importlib.util
+import json
 import os
+import queue
 import sys
-import threading
 import time
+from pathlib import PurePath
 
 # Import the centralized config manager
-from modules.config_manager import load_settings, save_settings, load_filters, save_filters, initialize_config_files
-
-# Placeholder for modules that will be imported dynamically
-# This prevents circular imports if they also import config_manager
-metadata_builder = None
-player_overlay = None
+from modules.config_manager import (load_settings, save_settings, load_filters, save_filters,
+                                    ensure_workspace, list_dir_names, CONFIG_DIR)
+
+def _lazy_import(name):
+    """
+    Returns the named module, deferring its execution until the first attribute access.
+    This keeps startup fast and avoids circular imports with config_manager.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+# Backend modules, only loaded when processing or playback first uses them
+metadata_builder = _lazy_import('modules.metadata_builder')
+player_overlay = _lazy_import('modules.player_overlay')
+
+# Written once the standalone launcher has created its directories and sample files.
+# Bump the name when the defaults change so existing installs are re-initialized.
+INIT_MARKER = os.path.join(CONFIG_DIR, '.initialized')
+
+# Supported input extensions, in the order matching files are auto-detected
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.flv', '.wmv')
+SUBTITLE_EXTENSIONS = ('.srt', '.sub', '.vtt')
+_VIDEO_EXTENSION_SET = frozenset(VIDEO_EXTENSIONS)
+_SUBTITLE_EXTENSION_SET = frozenset(SUBTITLE_EXTENSIONS)
+# Glob patterns for the input file dialog
+_MEDIA_FILE_PATTERNS = " ".join("*" + ext for ext in VIDEO_EXTENSIONS + SUBTITLE_EXTENSIONS)
+
+def _find_sibling(directory, base_name, extensions):
+    """
+    Returns the path of the first file in directory named base_name plus one of the
+    extensions, or None. Names are compared case-insensitively, as on Windows and macOS,
+    so Movie.SRT is found next to Movie.mp4; an exact-case match is preferred.
+    """
+    siblings = list_dir_names(directory)
+    by_lower_name = {}
+    for name in siblings:
+        by_lower_name.setdefault(name.lower(), name)
+    for ext in extensions:
+        name = base_name + ext
+        if name not in siblings:
+            name = by_lower_name.get(name.lower())
+        if name is not None:
+            return os.path.join(directory, name)
+    return None
 
 class CleanMediaGUI:
     def __init__(self, master):
@@ -25,15 +73,26 @@ class CleanMediaGUI:
         # Load initial settings and filters
         self.settings = load_settings()
         self.filters = load_filters()
+        # Serialized form of the filters as last loaded/saved, to skip redundant saves
+        self._saved_filters_state = json.dumps(self.filters, sort_keys=True)
 
-        self.create_widgets()
-        self.load_initial_values()
+        # GUI updates posted by any thread as (kind, payload); only the
+        # main thread touches widgets, in _drain_ui_queue
+        self._ui_queue = queue.Queue()
 
-        # Apply GUI theme from settings
+        # Apply GUI theme from settings before any widget exists, so widgets pick it up on creation
         self.apply_theme(self.settings.get('gui_theme', 'light'))
 
+        # Build the path frame and process button first so the window can paint,
+        # then build the slower filter controls and log area once Tk is idle
+        self._create_primary_widgets()
+        master.after_idle(self._create_secondary_widgets)
+
     def apply_theme(self, theme_name):
-        """Applies visual theme to the GUI."""
+        """
+        Applies visual theme to the GUI. Colors are set through ttk styles and the
+        Tk option database, so this applies to widgets created after the call.
+        """
         if theme_name == 'dark':
             bg_color = "#333333"
             fg_color = "#FFFFFF"
@@ -52,108 +111,126 @@ class CleanMediaGUI:
             frame_bg = "#E0E0E0"
 
         self.master.config(bg=bg_color)
-        for widget in self.master.winfo_children():
-            if isinstance(widget, (tk.LabelFrame, tk.Frame)):
-                widget.config(bg=frame_bg, fg=fg_color)
-                for child in widget.winfo_children():
-                    if isinstance(child, tk.Label):
-                        child.config(bg=frame_bg, fg=fg_color)
-                    elif isinstance(child, tk.Entry):
-                        child.config(bg=entry_bg, fg=fg_color, insertbackground=fg_color) # insertbackground for cursor
-                    elif isinstance(child, tk.Button):
-                        child.config(bg=button_bg, fg=button_fg)
-                    elif isinstance(child, tk.Checkbutton):
-                        child.config(bg=frame_bg, fg=fg_color, selectcolor=entry_bg)
-            elif isinstance(widget, tk.Label):
-                widget.config(bg=bg_color, fg=fg_color)
-            elif isinstance(widget, tk.Button):
-                widget.config(bg=button_bg, fg=button_fg)
-            elif isinstance(widget, tk.Checkbutton):
-                widget.config(bg=bg_color, fg=fg_color, selectcolor=entry_bg)
-            elif isinstance(widget, scrolledtext.ScrolledText):
-                widget.config(bg=entry_bg, fg=fg_color, insertbackground=fg_color)
-        
-        # Specific styling for process button
-        self.process_button.config(bg="#4CAF50" if theme_name == 'light' else "#28A745", fg="white")
-
 
-    def create_widgets(self):
+        # One style change per widget class restyles every ttk widget, current and future.
+        # 'clam' is used for both themes as it honours custom background colors on every platform.
+        style = ttk.Style(self.master)
+        style.theme_use('clam')
+        style.configure('.', background=frame_bg, foreground=fg_color)
+        style.configure('TLabelframe', background=frame_bg)
+        style.configure('TLabelframe.Label', background=frame_bg, foreground=fg_color)
+        style.configure('TEntry', fieldbackground=entry_bg, foreground=fg_color, insertcolor=fg_color)
+        style.configure('TButton', background=button_bg, foreground=button_fg)
+        style.configure('TMenubutton', background=button_bg, foreground=button_fg)
+        style.configure('TCheckbutton', indicatorbackground=entry_bg)
+        style.configure('Status.TLabel', background=bg_color)
+        # Specific styling for process button
+        style.configure('Process.TButton', background="#4CAF50" if theme_name == 'light' else "#28A745",
+                        foreground="white", font=("Arial", 12, "bold"))
+
+        # The threshold scales and log area are classic tk widgets that ttk styles don't reach,
+        # so their colors come from the option database
+        self.master.option_clear()
+        self.master.option_add('*Background', frame_bg)
+        self.master.option_add('*Foreground', fg_color)
+        self.master.option_add('*Scale.troughColor', entry_bg)
+        self.master.option_add('*Scale.highlightThickness', 0)
+        self.master.option_add('*Text.Background', entry_bg)
+        self.master.option_add('*Text.insertBackground', fg_color)
+
+    def _create_primary_widgets(self):
+        """Creates the widgets needed for the first paint: paths, status and process button."""
         # Frame for input/output paths
-        path_frame = tk.LabelFrame(self.master, text="Media Paths", padx=10, pady=10, relief="groove")
+        path_frame = ttk.LabelFrame(self.master, text="Media Paths", padding=10)
         path_frame.pack(padx=20, pady=10, fill="x", expand=True)
 
-        tk.Label(path_frame, text="Input Video/Subtitle:").grid(row=0, column=0, sticky="w", pady=5)
-        self.input_path_entry = tk.Entry(path_frame, width=60)
+        ttk.Label(path_frame, text="Input Video/Subtitle:").grid(row=0, column=0, sticky="w", pady=5)
+        self.input_path_entry = ttk.Entry(path_frame, width=60)
         self.input_path_entry.grid(row=0, column=1, padx=5, pady=5)
-        tk.Button(path_frame, text="Browse", command=self.browse_input).grid(row=0, column=2, padx=5, pady=5)
+        ttk.Button(path_frame, text="Browse", command=self.browse_input).grid(row=0, column=2, padx=5, pady=5)
 
-        tk.Label(path_frame, text="Output Directory:").grid(row=1, column=0, sticky="w", pady=5)
-        self.output_path_entry = tk.Entry(path_frame, width=60)
+        ttk.Label(path_frame, text="Output Directory:").grid(row=1, column=0, sticky="w", pady=5)
+        self.output_path_entry = ttk.Entry(path_frame, width=60)
         self.output_path_entry.grid(row=1, column=1, padx=5, pady=5)
-        tk.Button(path_frame, text="Browse", command=self.browse_output).grid(row=1, column=2, padx=5, pady=5)
+        ttk.Button(path_frame, text="Browse", command=self.browse_output).grid(row=1, column=2, padx=5, pady=5)
+
+        # Process Button and Progress
+        self._status_var = tk.StringVar(value="Status: Ready")
+        self.progress_label = ttk.Label(self.master, textvariable=self._status_var, anchor="w", style='Status.TLabel')
+        self.progress_label.pack(padx=20, pady=5, fill="x")
+
+        # Stays disabled until the filter controls and log area exist
+        self.process_button = ttk.Button(self.master, text="Process Media", command=self.start_processing_thread,
+                                         style='Process.TButton', state="disabled")
+        self.process_button.pack(pady=10, ipadx=20, ipady=10)
 
-        # Frame for filter settings
-        filter_frame = tk.LabelFrame(self.master, text="Content Filters", padx=10, pady=10, relief="groove")
-        filter_frame.pack(padx=20, pady=10, fill="x", expand=True)
+    def _create_secondary_widgets(self):
+        """Creates the filter controls and log area, then loads their initial values."""
+        # Frame for filter settings, packed above the status label
+        filter_frame = ttk.LabelFrame(self.master, text="Content Filters", padding=10)
+        filter_frame.pack(padx=20, pady=10, fill="x", expand=True, before=self.progress_label)
 
         # Profanity Filter
         self.profanity_var = tk.BooleanVar()
-        tk.Checkbutton(filter_frame, text="Enable Profanity Filter", variable=self.profanity_var,
-                       command=self.toggle_profanity_controls).grid(row=0, column=0, sticky="w", pady=2)
+        ttk.Checkbutton(filter_frame, text="Enable Profanity Filter", variable=self.profanity_var,
+                        command=self.toggle_profanity_controls).grid(row=0, column=0, sticky="w", pady=2)
         
-        tk.Label(filter_frame, text="Profane Words (comma-separated):").grid(row=1, column=0, sticky="w", padx=20)
-        self.profanity_words_entry = tk.Entry(filter_frame, width=50)
+        ttk.Label(filter_frame, text="Profane Words (comma-separated):").grid(row=1, column=0, sticky="w", padx=20)
+        self.profanity_words_entry = ttk.Entry(filter_frame, width=50)
         self.profanity_words_entry.grid(row=1, column=1, columnspan=2, padx=5, pady=2, sticky="ew")
 
-        tk.Label(filter_frame, text="Replace With:").grid(row=2, column=0, sticky="w", padx=20)
-        self.profanity_replace_entry = tk.Entry(filter_frame, width=20)
+        ttk.Label(filter_frame, text="Replace With:").grid(row=2, column=0, sticky="w", padx=20)
+        self.profanity_replace_entry = ttk.Entry(filter_frame, width=20)
         self.profanity_replace_entry.grid(row=2, column=1, padx=5, pady=2, sticky="w")
         
-        tk.Label(filter_frame, text="Action:").grid(row=2, column=2, sticky="e")
+        ttk.Label(filter_frame, text="Action:").grid(row=2, column=2, sticky="e")
         self.profanity_action_var = tk.StringVar(value="mute_audio")
-        tk.OptionMenu(filter_frame, self.profanity_action_var, "mute_audio", "replace_text").grid(row=2, column=3, sticky="w", padx=5)
+        self.profanity_action_menu = ttk.OptionMenu(filter_frame, self.profanity_action_var, None, "mute_audio", "replace_text")
+        self.profanity_action_menu.grid(row=2, column=3, sticky="w", padx=5)
 
 
         # Nudity Filter
         self.nudity_var = tk.BooleanVar()
-        tk.Checkbutton(filter_frame, text="Enable Nudity Filter", variable=self.nudity_var,
-                       command=self.toggle_nudity_controls).grid(row=3, column=0, sticky="w", pady=2)
+        ttk.Checkbutton(filter_frame, text="Enable Nudity Filter", variable=self.nudity_var,
+                        command=self.toggle_nudity_controls).grid(row=3, column=0, sticky="w", pady=2)
         
-        tk.Label(filter_frame, text="Threshold (0.0-1.0):").grid(row=4, column=0, sticky="w", padx=20)
+        ttk.Label(filter_frame, text="Threshold (0.0-1.0):").grid(row=4, column=0, sticky="w", padx=20)
         self.nudity_threshold_scale = tk.Scale(filter_frame, from_=0.0, to=1.0, resolution=0.05,
                                                 orient="horizontal", length=200, relief="flat", bd=0)
         self.nudity_threshold_scale.grid(row=4, column=1, columnspan=2, sticky="ew")
         
-        tk.Label(filter_frame, text="Action:").grid(row=4, column=3, sticky="e")
+        ttk.Label(filter_frame, text="Action:").grid(row=4, column=3, sticky="e")
         self.nudity_action_var = tk.StringVar(value="blur_region")
-        tk.OptionMenu(filter_frame, self.nudity_action_var, "blur_region", "skip_scene").grid(row=4, column=4, sticky="w", padx=5)
+        self.nudity_action_menu = ttk.OptionMenu(filter_frame, self.nudity_action_var, None, "blur_region", "skip_scene")
+        self.nudity_action_menu.grid(row=4, column=4, sticky="w", padx=5)
 
 
         # Violence Filter
         self.violence_var = tk.BooleanVar()
-        tk.Checkbutton(filter_frame, text="Enable Violence Filter", variable=self.violence_var,
-                       command=self.toggle_violence_controls).grid(row=5, column=0, sticky="w", pady=2)
+        ttk.Checkbutton(filter_frame, text="Enable Violence Filter", variable=self.violence_var,
+                        command=self.toggle_violence_controls).grid(row=5, column=0, sticky="w", pady=2)
         
-        tk.Label(filter_frame, text="Threshold (0.0-1.0):").grid(row=6, column=0, sticky="w", padx=20)
+        ttk.Label(filter_frame, text="Threshold (0.0-1.0):").grid(row=6, column=0, sticky="w", padx=20)
         self.violence_threshold_scale = tk.Scale(filter_frame, from_=0.0, to=1.0, resolution=0.05,
                                                  orient="horizontal", length=200, relief="flat", bd=0)
         self.violence_threshold_scale.grid(row=6, column=1, columnspan=2, sticky="ew")
         
-        tk.Label(filter_frame, text="Action:").grid(row=6, column=3, sticky="e")
+        ttk.Label(filter_frame, text="Action:").grid(row=6, column=3, sticky="e")
         self.violence_action_var = tk.StringVar(value="skip_scene")
-        tk.OptionMenu(filter_frame, self.violence_action_var, "skip_scene", "mute_audio").grid(row=6, column=4, sticky="w", padx=5)
-
-        # Process Button and Progress
-        self.progress_label = tk.Label(self.master, text="Status: Ready", anchor="w")
-        self.progress_label.pack(padx=20, pady=5, fill="x")
-
-        self.process_button = tk.Button(self.master, text="Process Media", command=self.start_processing_thread,
-                                        bg="#4CAF50", fg="white", font=("Arial", 12, "bold"), relief="raised", bd=3)
-        self.process_button.pack(pady=10, ipadx=20, ipady=10)
+        self.violence_action_menu = ttk.OptionMenu(filter_frame, self.violence_action_var, None, "skip_scene", "mute_audio")
+        self.violence_action_menu.grid(row=6, column=4, sticky="w", padx=5)
 
         # Log output area
-        self.log_text = scrolledtext.ScrolledText(self.master, wrap=tk.WORD, height=8, state='disabled')
+        # Left in the 'normal' state so appends need no state toggling; user edits are blocked instead
+        self.log_text = scrolledtext.ScrolledText(self.master, wrap=tk.WORD, height=8)
         self.log_text.pack(padx=20, pady=10, fill="both", expand=True)
+        self.log_text.bind('<Key>', self._block_log_edit)
+        for sequence in ('<<Paste>>', '<<Cut>>', '<<Clear>>', '<Button-2>'):
+            self.log_text.bind(sequence, lambda event: "break")
+
+        self.load_initial_values()
+        self.process_button.config(state="normal")
+        self.master.after(50, self._drain_ui_queue)
 
     def load_initial_values(self):
         # Load paths from settings
@@ -187,140 +264,220 @@ class CleanMediaGUI:
         state = "normal" if self.profanity_var.get() else "disabled"
         self.profanity_words_entry.config(state=state)
         self.profanity_replace_entry.config(state=state)
-        self.profanity_action_var.set(self.profanity_action_var.get()) # Refresh OptionMenu state
-        self.master.children['!labelframe2'].children['!menubutton2'].config(state=state) # Access OptionMenu by internal name
+        self.profanity_action_menu.config(state=state)
 
     def toggle_nudity_controls(self):
         """Enables/disables nudity-related controls based on checkbox state."""
         state = "normal" if self.nudity_var.get() else "disabled"
         self.nudity_threshold_scale.config(state=state)
-        self.nudity_action_var.set(self.nudity_action_var.get())
-        self.master.children['!labelframe2'].children['!menubutton3'].config(state=state)
+        self.nudity_action_menu.config(state=state)
 
     def toggle_violence_controls(self):
         """Enables/disables violence-related controls based on checkbox state."""
         state = "normal" if self.violence_var.get() else "disabled"
         self.violence_threshold_scale.config(state=state)
-        self.violence_action_var.set(self.violence_action_var.get())
-        self.master.children['!labelframe2'].children['!menubutton4'].config(state=state)
+        self.violence_action_menu.config(state=state)
 
     def browse_input(self):
+        from tkinter import filedialog
         file_path = filedialog.askopenfilename(
             title="Select Input Video or Subtitle File",
-            filetypes=[("Media Files", "*.mp4 *.avi *.mkv *.srt *.sub"), ("All Files", "*.*")]
+            filetypes=[("Media Files", _MEDIA_FILE_PATTERNS), ("All Files", "*.*")]
         )
         if file_path:
             self.input_path_entry.delete(0, tk.END)
             self.input_path_entry.insert(0, file_path)
 
     def browse_output(self):
+        from tkinter import filedialog
         dir_path = filedialog.askdirectory(title="Select Output Directory")
         if dir_path:
             self.output_path_entry.delete(0, tk.END)
             self.output_path_entry.insert(0, dir_path)
 
+    def _block_log_edit(self, event):
+        """Keeps the log area read-only while still allowing Ctrl+C / Ctrl+A."""
+        if event.state & 0x4 and event.keysym.lower() in ('c', 'a'):
+            return None
+        return "break"
+
     def log_message(self, message):
-        """Appends a message to the GUI log area."""
-        self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END) # Scroll to the end
-        self.log_text.config(state='disabled')
-        self.master.update_idletasks() # Force GUI update
+        """Queues a message for the GUI log area. Safe to call from any thread."""
+        self._ui_queue.put(('log', message))
 
     def update_progress_label(self, message):
-        """Updates the progress label with a new message."""
-        self.progress_label.config(text=f"Status: {message}")
-        self.master.update_idletasks() # Force GUI update
+        """Queues a new progress label message. Safe to call from any thread."""
+        self._ui_queue.put(('status', message))
+
+    def _drain_ui_queue(self):
+        """Applies all pending GUI updates on the main thread, then reschedules itself."""
+        lines = []
+        status = None
+        processing_done = False
+        playback_request = None
+        while True:
+            try:
+                kind, payload = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'log':
+                lines.append(payload + "\n")
+            elif kind == 'status':
+                status = payload
+            elif kind == 'done':
+                processing_done = True
+            elif kind == 'ask_playback':
+                playback_request = payload
+
+        if lines:
+            self.log_text.insert(tk.END, "".join(lines))
+            self.log_text.see(tk.END) # Scroll to the end
+        if status is not None:
+            self._status_var.set(f"Status: {status}")
+        if processing_done:
+            self.process_button.config(state="normal")
+        if playback_request is not None:
+            self._offer_playback(*playback_request)
+        self.master.after(50, self._drain_ui_queue)
+
+    def _offer_playback(self, video_file, metadata_path):
+        """Asks on the main thread whether to simulate playback, then runs it in a worker thread."""
+        from tkinter import messagebox
+        if not messagebox.askyesno("Playback", "Do you want to simulate playback with filtering?"):
+            self.update_progress_label("Processing complete.")
+            self._ui_queue.put(('done', None))
+            return
+
+        import threading
+        playback_thread = threading.Thread(target=self._playback_task, args=(video_file, metadata_path))
+        playback_thread.start()
+
+    def _playback_task(self, video_file, metadata_path):
+        """Runs the playback simulation in a separate thread; all output goes through the UI queue."""
+        try:
+            self.update_progress_label("Starting playback simulation...")
+            # Check if metadata file was actually created and has content
+            if os.path.exists(metadata_path) and os.path.getsize(metadata_path) > 2: # Check for empty JSON {}
+                controller = player_overlay.MediaPlaybackController(video_file if video_file else "simulated_video.mp4", metadata_path)
+                controller.play(self.log_message) # Pass log_message to controller for output
+                self.log_message("Playback simulation finished.")
+            else:
+                self.log_message(f"Error: Metadata file not found or is empty at {metadata_path}. Cannot simulate playback.")
+            self.update_progress_label("Processing complete.")
+        except Exception as e:
+            self.log_message(f"Error during playback simulation: {e}")
+            self.update_progress_label("Ready (Error)")
+        finally:
+            self._ui_queue.put(('done', None)) # Re-enable button on main thread
 
     def start_processing_thread(self):
         """Starts the media processing in a separate thread to keep GUI responsive."""
         self.process_button.config(state="disabled") # Disable button during processing
-        self.log_text.config(state='normal')
         self.log_text.delete('1.0', tk.END) # Clear previous logs
-        self.log_text.config(state='disabled')
         self.update_progress_label("Starting processing...")
 
-        # Clear placeholder imports if they exist (for re-runs in a single session)
-        global metadata_builder, player_overlay
-        metadata_builder = None
-        player_overlay = None
+        # Tk widgets and variables may only be touched on the main thread, so every
+        # input is read here and handed to the worker
+        input_file = self.input_path_entry.get()
+        output_dir = self.output_path_entry.get()
+        filters_snapshot = self._snapshot_filters_from_gui()
 
-        processing_thread = threading.Thread(target=self._process_media_task)
+        import threading
+        processing_thread = threading.Thread(target=self._process_media_task,
+                                             args=(input_file, output_dir, filters_snapshot))
         processing_thread.start()
 
-    def _process_media_task(self):
+    def _process_media_task(self, input_file, output_dir, filters_snapshot):
         """Actual media processing logic run in a separate thread."""
+        playback_request = None
         try:
-            self._process_media_logic()
+            playback_request = self._process_media_logic(input_file, output_dir, filters_snapshot)
         finally:
-            self.master.after(0, lambda: self.process_button.config(state="normal")) # Re-enable button on main thread
-
-    def _process_media_logic(self):
-        """Contains the core logic for processing media."""
-        input_file = self.input_path_entry.get()
-        output_dir = self.output_path_entry.get()
-
+            if playback_request is not None:
+                # The main thread asks the user and re-enables the button once playback is done
+                self._ui_queue.put(('ask_playback', playback_request))
+            else:
+                self._ui_queue.put(('done', None)) # Re-enable button on main thread
+
+    def _snapshot_filters_from_gui(self):
+        """Reads every filter control once and returns the values as a filters-shaped dict."""
+        return {
+            'profanity': {
+                'enabled': self.profanity_var.get(),
+                'word_list': [w.strip() for w in self.profanity_words_entry.get().split(',') if w.strip()],
+                'replace_with': self.profanity_replace_entry.get(),
+                'action': self.profanity_action_var.get()
+            },
+            'nudity': {
+                'enabled': self.nudity_var.get(),
+                'detection_threshold': self.nudity_threshold_scale.get(),
+                'action': self.nudity_action_var.get()
+            },
+            'violence': {
+                'enabled': self.violence_var.get(),
+                'detection_threshold': self.violence_threshold_scale.get(),
+                'action': self.violence_action_var.get()
+            }
+        }
+
+    def _process_media_logic(self, input_file, output_dir, filters_snapshot):
+        """
+        Contains the core logic for processing media. Runs on the worker thread and
+        only works on the values read from the GUI by start_processing_thread.
+        Returns (video_file, metadata_path) when playback can be offered, else None.
+        """
         if not input_file or not output_dir:
             self.log_message("Error: Please select both input file and output directory.")
             self.update_progress_label("Ready (Error)")
             return
 
-        # Update filter settings from current GUI state
-        self.filters['profanity']['enabled'] = self.profanity_var.get()
-        self.filters['profanity']['word_list'] = [w.strip() for w in self.profanity_words_entry.get().split(',') if w.strip()]
-        self.filters['profanity']['replace_with'] = self.profanity_replace_entry.get()
-        self.filters['profanity']['action'] = self.profanity_action_var.get()
-
-        self.filters['nudity']['enabled'] = self.nudity_var.get()
-        self.filters['nudity']['detection_threshold'] = self.nudity_threshold_scale.get()
-        self.filters['nudity']['action'] = self.nudity_action_var.get()
+        # Update filter settings from current GUI state, keeping any extra keys from filters.json
+        for section, values in filters_snapshot.items():
+            self.filters.setdefault(section, {}).update(values)
 
-        self.filters['violence']['enabled'] = self.violence_var.get()
-        self.filters['violence']['detection_threshold'] = self.violence_threshold_scale.get()
-        self.filters['violence']['action'] = self.violence_action_var.get()
-        
-        # Save updated filters
-        try:
-            save_filters(self.filters)
-            self.log_message("Filter settings updated and saved.")
-        except Exception as e:
-            self.log_message(f"Warning: Could not save filter settings: {e}")
+        # Save updated filters, but only if they changed since the last save
+        filters_state = json.dumps(self.filters, sort_keys=True)
+        if filters_state != self._saved_filters_state:
+            # Only remember the state once it is on disk, so a failed save is retried next run
+            if save_filters(self.filters):
+                self._saved_filters_state = filters_state
+                self.log_message("Filter settings updated and saved.")
+            else:
+                self.log_message("Warning: Could not save filter settings.")
 
         # Determine if input is video or subtitle
         video_file = None
         subtitle_file = None
-        input_extension = os.path.splitext(input_file)[1].lower()
+        input_path = PurePath(input_file)
+        input_extension = input_path.suffix.lower()
+        base_name = input_path.stem
+        input_dir = os.path.dirname(input_file)
 
-        if input_extension in ('.mp4', '.avi', '.mkv', '.mov', '.flv', '.wmv'):
+        if input_extension in _VIDEO_EXTENSION_SET:
             video_file = input_file
             # Try to find a matching subtitle file in the same directory
-            base_name = os.path.splitext(os.path.basename(input_file))[0]
-            for ext in ['.srt', '.sub', '.vtt']: # Added .vtt for broader support
-                candidate_sub = os.path.join(os.path.dirname(input_file), base_name + ext)
-                if os.path.exists(candidate_sub):
-                    subtitle_file = candidate_sub
-                    self.log_message(f"Auto-detected subtitle file: {subtitle_file}")
-                    break
-            if not subtitle_file:
+            subtitle_file = _find_sibling(input_dir, base_name, SUBTITLE_EXTENSIONS)
+            if subtitle_file:
+                self.log_message(f"Auto-detected subtitle file: {subtitle_file}")
+            else:
                 self.log_message("No matching subtitle file found in the same directory. Proceeding without subtitles (unless input was a subtitle file).")
-        elif input_extension in ('.srt', '.sub', '.vtt'):
+        elif input_extension in _SUBTITLE_EXTENSION_SET:
             subtitle_file = input_file
             # Try to find a matching video file in the same directory
-            base_name = os.path.splitext(os.path.basename(input_file))[0]
-            for ext in ['.mp4', '.avi', '.mkv', '.mov', '.flv', '.wmv']:
-                candidate_video = os.path.join(os.path.dirname(input_file), base_name + ext)
-                if os.path.exists(candidate_video):
-                    video_file = candidate_video
-                    self.log_message(f"Auto-detected video file: {video_file}")
-                    break
-            if not video_file:
+            video_file = _find_sibling(input_dir, base_name, VIDEO_EXTENSIONS)
+            if video_file:
+                self.log_message(f"Auto-detected video file: {video_file}")
+            else:
                 self.log_message("No matching video file found for the subtitle. Video scanning will be skipped.")
         else:
             self.log_message(f"Error: Unsupported file type for input: {input_extension}. Please select a video or subtitle file.")
             self.update_progress_label("Ready (Error)")
             return
 
-        if not video_file and self.nudity_var.get() or self.violence_var.get():
+        # Reuse the values already read from the checkboxes above
+        want_nudity = self.filters['nudity']['enabled']
+        want_violence = self.filters['violence']['enabled']
+        if not video_file and (want_nudity or want_violence):
             self.log_message("Warning: Video scanning cannot be performed without a video file. Disabling Nudity/Violence filters for this run.")
             self.filters['nudity']['enabled'] = False
             self.filters['violence']['enabled'] = False
@@ -329,41 +486,24 @@ class CleanMediaGUI:
         # Import and run backend processing
         try:
             self.update_progress_label("Building media metadata...")
-            global metadata_builder
-            if metadata_builder is None:
-                from modules.metadata_builder import build_media_metadata
-                metadata_builder = build_media_metadata
-
-            meta = metadata_builder(video_file, subtitle_file, output_dir)
+            meta = metadata_builder.build_media_metadata(video_file, subtitle_file, output_dir, filters=self.filters)
+            if not any(meta['filters_applied'].values()):
+                self.log_message("All filters are disabled; enable at least one filter to generate metadata.")
+                self.update_progress_label("Ready")
+                return
             
             # Use the actual video file name for preview path, even if subtitle was main input
-            display_video_name = os.path.splitext(os.path.basename(video_file))[0] if video_file else "unknown_media"
+            display_video_name = PurePath(video_file).stem if video_file else "unknown_media"
             preview_path = os.path.join(output_dir, display_video_name + '_preview.txt')
+            metadata_path = os.path.join(output_dir, display_video_name + '.json')
             
             self.log_message(f"Processing Complete: Metadata and preview generated.")
-            self.log_message(f"Metadata saved to: {os.path.join(output_dir, display_video_name + '.json')}")
+            self.log_message(f"Metadata saved to: {metadata_path}")
             self.log_message(f"Preview report: {preview_path}")
             self.update_progress_label("Metadata Generated. Ready for Playback.")
 
-            # Optionally, offer to launch playback simulation
-            if messagebox.askyesno("Playback", "Do you want to simulate playback with filtering?"):
-                self.update_progress_label("Starting playback simulation...")
-                global player_overlay
-                if player_overlay is None:
-                    from modules.player_overlay import MediaPlaybackController
-                    player_overlay = MediaPlaybackController
-
-                metadata_path = os.path.join(output_dir, display_video_name + '.json')
-                
-                # Check if metadata file was actually created and has content
-                if os.path.exists(metadata_path) and os.path.getsize(metadata_path) > 2: # Check for empty JSON {}
-                    controller = player_overlay(video_file if video_file else "simulated_video.mp4", metadata_path)
-                    controller.play(self.log_message) # Pass log_message to controller for output
-                    self.log_message("Playback simulation finished.")
-                else:
-                    self.log_message(f"Error: Metadata file not found or is empty at {metadata_path}. Cannot simulate playback.")
-            
-            self.update_progress_label("Processing complete.")
+            # Optionally, offer to launch playback simulation; the dialog has to run on the main thread
+            return video_file, metadata_path
 
         except Exception as e:
             self.log_message(f"Error during processing: {e}")
@@ -376,33 +516,43 @@ def launch_tkinter_gui():
     root.mainloop()
 
 if __name__ == "__main__":
-    # Ensure config files and necessary directories exist on script start
-    initialize_config_files()
-    os.makedirs('movie/input', exist_ok=True)
-    os.makedirs('movie/output', exist_ok=True)
-    os.makedirs('movie/metadata', exist_ok=True)
-    os.makedirs('modules', exist_ok=True) # Ensure modules directory exists
-
-    # Create dummy video/subtitle/metadata files if they don't exist, for consistent startup
-    dummy_video = 'movie/input/sample_movie.mp4'
-    dummy_subtitle = 'movie/input/sample_movie.srt'
-    dummy_metadata_file = 'movie/metadata/sample_movie.json'
-    dummy_preview_file = 'movie/metadata/sample_movie_preview.txt'
-
-    if not os.path.exists(dummy_video):
-        with open(dummy_video, 'w') as f: f.write("# Placeholder for sample_movie.mp4")
-    if not os.path.exists(dummy_subtitle):
-        with open(dummy_subtitle, 'w', encoding='utf-8') as f:
-            f.write("""1
+    # Ensure config files, directories and sample files exist on first launch only;
+    # a warm start costs a single stat() of the marker
+    try:
+        os.stat(INIT_MARKER)
+        first_launch = False
+    except FileNotFoundError:
+        first_launch = True
+
+    if first_launch:
+        ensure_workspace()
+
+        # Sample video/subtitle/metadata files are development scaffolding; only create
+        # them when CLEANMEDIA_DEV is set so regular launches write nothing but config
+        if os.environ.get('CLEANMEDIA_DEV'):
+            dummy_video = 'movie/input/sample_movie.mp4'
+            dummy_subtitle = 'movie/input/sample_movie.srt'
+            dummy_metadata_file = 'movie/metadata/sample_movie.json'
+            dummy_preview_file = 'movie/metadata/sample_movie_preview.txt'
+            existing_inputs = list_dir_names('movie/input')
+            existing_metadata = list_dir_names('movie/metadata')
+
+            if os.path.basename(dummy_video) not in existing_inputs:
+                with open(dummy_video, 'w') as f: f.write("# Placeholder for sample_movie.mp4")
+            if os.path.basename(dummy_subtitle) not in existing_inputs:
+                with open(dummy_subtitle, 'w', encoding='utf-8') as f:
+                    f.write("""1
 00:00:01,000 --> 00:00:03,000
 This is a damn test.
 2
 00:00:04,000 --> 00:00:06,000
 Oh, hell no.
 """)
-    if not os.path.exists(dummy_metadata_file):
-        with open(dummy_metadata_file, 'w') as f: f.write('{}')
-    if not os.path.exists(dummy_preview_file):
-        with open(dummy_preview_file, 'w') as f: f.write('Media actions log placeholder.')
+            if os.path.basename(dummy_metadata_file) not in existing_metadata:
+                with open(dummy_metadata_file, 'w') as f: f.write('{}')
+            if os.path.basename(dummy_preview_file) not in existing_metadata:
+                with open(dummy_preview_file, 'w') as f: f.write('Media actions log placeholder.')
+
+        with open(INIT_MARKER, 'w') as f: f.write('')
 
     launch_tkinter_gui()
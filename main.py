@@ -1,24 +1,44 @@
 # CleanMedia/main.py
 
+import functools
 import os
+import stat
 import sys
-import argparse
 
-# Import the centralized config manager to ensure files are initialized
-from modules.config_manager import initialize_config_files, load_filters, load_settings, save_filters
+# Heavier modules (argparse, config_manager/yaml, the processing backend and the GUI)
+# are imported inside the code path that needs them to keep startup fast.
 
 # Real GUI launcher
 def launch_gui():
+    from modules.config_manager import ensure_workspace
+    ensure_workspace()
+
     from gui.launcher_gui import launch_tkinter_gui
     launch_tkinter_gui()
 
-# Real CLI logic
-def run_cli():
+def _safe_stat(path):
+    """Returns os.stat(path), or None if the path does not exist."""
+    try:
+        return os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+def _is_file(path):
+    """Returns True if path is an existing regular file, from a single stat."""
+    st = _safe_stat(path)
+    return st is not None and stat.S_ISREG(st.st_mode)
+
+@functools.lru_cache(maxsize=1)
+def _build_parser():
+    """Builds the CLI argument parser once; repeated run_cli() calls reuse it."""
+    import argparse
+
     parser = argparse.ArgumentParser(description="CleanMedia CLI")
     parser.add_argument('--video', type=str, help='Path to input video file')
     parser.add_argument('--subtitle', type=str, help='Path to input subtitle file (optional)')
     parser.add_argument('--output', type=str, default='movie/metadata', help='Output directory for metadata and preview')
     parser.add_argument('--play', action='store_true', help='Simulate playback after processing')
+    parser.add_argument('--no-preview', action='store_true', help='Only write the metadata JSON, skip the preview report')
     
     # CLI arguments for filter settings
     parser.add_argument('--profanity-enable', action='store_true', help='Enable profanity filter')
@@ -34,13 +54,22 @@ def run_cli():
     parser.add_argument('--violence-threshold', type=float, help='Violence detection threshold (0.0-1.0)')
     parser.add_argument('--violence-action', type=str, choices=['skip_scene', 'mute_audio'], default='skip_scene', help='Action for violence')
 
+    return parser
 
+# Real CLI logic
+def run_cli():
+    from pathlib import PurePath
+    from modules.config_manager import ensure_workspace, load_filters, save_filters
+
+    parser = _build_parser()
     args = parser.parse_args(sys.argv[2:] if sys.argv[1] == '--cli' else sys.argv[1:])
 
     if not args.video:
         print("Error: --video argument is required for CLI mode.")
         return
 
+    ensure_workspace()
+
     # Load existing filters, then override with CLI arguments
     filters = load_filters()
 
@@ -74,31 +103,43 @@ def run_cli():
     subtitle_file = args.subtitle
     output_dir = args.output
 
+    # Stat the inputs once; the results are passed down so the builder does not re-check them
+    video_exists = _is_file(video_file)
+    subtitle_exists = _is_file(subtitle_file) if subtitle_file else False
+
     # Determine if video file exists to avoid trying to scan non-existent files
-    if not os.path.exists(video_file) and (filters['nudity']['enabled'] or filters['violence']['enabled']):
+    if not video_exists and (filters['nudity']['enabled'] or filters['violence']['enabled']):
         print(f"Warning: Video file '{video_file}' not found. Nudity and Violence scanning will be skipped.")
         # Temporarily disable filters for the current run if video is missing
         filters['nudity']['enabled'] = False
         filters['violence']['enabled'] = False
     
     # Determine if subtitle file exists
-    if subtitle_file and not os.path.exists(subtitle_file):
+    if subtitle_file and not subtitle_exists:
         print(f"Warning: Subtitle file '{subtitle_file}' not found. Subtitle parsing will be skipped.")
         subtitle_file = None # Ensure it's treated as None
 
     from modules.metadata_builder import build_media_metadata
-    meta = build_media_metadata(video_file, subtitle_file, output_dir)
+    meta = build_media_metadata(video_file, subtitle_file, output_dir, write_preview=not args.no_preview,
+                                video_exists=video_exists, subtitle_exists=subtitle_exists, filters=filters)
+    if not any(meta['filters_applied'].values()):
+        print("All filters are disabled; enable at least one filter to generate metadata.")
+        return
     
     # Use the actual video file name for preview path, even if subtitle was main input
-    display_video_name = os.path.splitext(os.path.basename(video_file))[0] if video_file else "cli_processed_media"
-    preview_path = os.path.join(output_dir, display_video_name + '_preview.txt')
-    print(f"Metadata and preview generated. Preview: {preview_path}")
+    display_video_name = PurePath(video_file).stem if video_file else "cli_processed_media"
+    metadata_path = os.path.join(output_dir, display_video_name + '.json')
+    if args.no_preview:
+        print(f"Metadata generated: {metadata_path}")
+    else:
+        preview_path = os.path.join(output_dir, display_video_name + '_preview.txt')
+        print(f"Metadata and preview generated. Preview: {preview_path}")
 
     if args.play:
         from modules.player_overlay import MediaPlaybackController
-        metadata_path = os.path.join(output_dir, display_video_name + '.json')
         # Check if metadata file was actually created and has content
-        if os.path.exists(metadata_path) and os.path.getsize(metadata_path) > 2: # Check for empty JSON {}
+        metadata_stat = _safe_stat(metadata_path)
+        if metadata_stat is not None and metadata_stat.st_size > 2: # Check for empty JSON {}
             controller = MediaPlaybackController(video_file, metadata_path)
             controller.play(log_callback=print) # Pass print for CLI logging
         else:
@@ -106,14 +147,8 @@ def run_cli():
 
 
 def main():
-    # Ensure necessary directories and config files exist before anything else
-    os.makedirs('config', exist_ok=True)
-    os.makedirs('gui', exist_ok=True) # Ensure gui directory exists for launcher_gui
-    os.makedirs('movie/input', exist_ok=True)
-    os.makedirs('movie/output', exist_ok=True)
-    os.makedirs('movie/metadata', exist_ok=True)
-    os.makedirs('modules', exist_ok=True)
-    initialize_config_files() # Call the function from config_manager
+    # Workspace directories and config files are created by the GUI/CLI paths themselves
+    # (see ensure_workspace), so --help and import do not touch the filesystem.
 
     # Basic logic to determine if GUI should be launched or CLI
     if len(sys.argv) > 1 and sys.argv[1] == '--cli':
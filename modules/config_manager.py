@@ -1,39 +1,175 @@
 # CleanMedia/modules/config_manager.py
 
+import copy
+import functools
 import json
+import re
+import tempfile
 import yaml
 import os
 
+# Prefer the libyaml-backed loader/dumper; PyYAML may be built without them
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+# pyahocorasick is optional; without it profanity matching uses the compiled regex
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# orjson is an optional, much faster JSON parser
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Parses JSON bytes; orjson.JSONDecodeError subclasses json.JSONDecodeError
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 # Define file paths relative to the project root
 CONFIG_DIR = 'config'
 FILTERS_PATH = os.path.join(CONFIG_DIR, 'filters.json')
 SETTINGS_PATH = os.path.join(CONFIG_DIR, 'settings.yaml')
+# JSON copy of the parsed settings.yaml, so a fresh process can skip the YAML parser
+SETTINGS_CACHE_PATH = SETTINGS_PATH + '.cache.json'
+
+# Directories the application reads from and writes to
+WORKSPACE_DIRS = (CONFIG_DIR, 'movie/input', 'movie/output', 'movie/metadata')
+
+# Parsed config files keyed by path, stored as ((st_mtime_ns, st_size), data)
+_CONFIG_CACHE = {}
+
+def _load_cached(path, parse):
+    """
+    Parses a config file's raw bytes with the given parser, reusing the previous
+    result while the file's modification time and size are unchanged.
+    A deep copy is returned so callers can freely modify it.
+    Raises FileNotFoundError if the file does not exist.
+    """
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size)
+    hit = _CONFIG_CACHE.get(path)
+    if hit is None or hit[0] != signature:
+        with open(path, 'rb') as f:
+            hit = (signature, parse(f.read()))
+        _CONFIG_CACHE[path] = hit
+    return copy.deepcopy(hit[1])
+
+@functools.lru_cache(maxsize=1)
+def _get_umask():
+    """Returns the process umask, read once since os.umask can only read it by setting it."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+def _write_atomic(path, text):
+    """
+    Writes text to path in a single write through a uniquely named temporary file
+    in the same directory, then swaps it into place so readers never see a partial
+    file and concurrent saves never share a temporary file.
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        mode = 0o666 & ~_get_umask()
+    f = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(path) or '.',
+                                    suffix='.tmp', delete=False)
+    tmp_path = f.name
+    try:
+        with f:
+            f.write(text)
+        # NamedTemporaryFile creates the file 0600; keep the permissions of the file it
+        # replaces, or give a new file the ones open() would have
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def list_dir_names(directory):
+    """Returns the set of entry names in a directory (empty if it cannot be read), using one scandir pass."""
+    try:
+        with os.scandir(directory or '.') as entries:
+            return {entry.name for entry in entries}
+    except OSError:
+        return set()
+
+def ensure_dir(directory):
+    """Creates a directory if missing; a single stat when it already exists, instead of a failing mkdir."""
+    if not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+
+def _parse_yaml(data):
+    """Safely parses YAML bytes with the fastest available loader."""
+    return yaml.load(data, Loader=_YamlLoader)
+
+def _settings_signature():
+    """Returns the (st_mtime_ns, st_size) stat signature of settings.yaml."""
+    st = os.stat(SETTINGS_PATH)
+    return [st.st_mtime_ns, st.st_size]
+
+def _write_settings_sidecar(settings_data):
+    """
+    Refreshes the JSON sidecar of settings.yaml, tagged with the YAML's stat signature;
+    a failure only costs the next start a YAML parse.
+    """
+    try:
+        sidecar = {"yaml_signature": _settings_signature(), "settings": settings_data}
+        _write_atomic(SETTINGS_CACHE_PATH, json.dumps(sidecar))
+    except (OSError, TypeError, ValueError):
+        pass
+
+def _parse_settings(data):
+    """
+    Parses settings.yaml bytes. The JSON sidecar is used instead when it was written for
+    exactly this settings.yaml (same modification time and size); otherwise the YAML is
+    parsed and the sidecar rewritten. A newer-looking sidecar is not enough, since a
+    settings.yaml restored with its old timestamp would then never be read.
+    """
+    try:
+        with open(SETTINGS_CACHE_PATH, 'rb') as f:
+            sidecar = _json_loads(f.read())
+        if sidecar.get("yaml_signature") == _settings_signature():
+            return sidecar["settings"]
+    except (OSError, ValueError, AttributeError, KeyError):
+        pass # Missing, unreadable, corrupt or outdated sidecar: fall back to the YAML
+    settings = _parse_yaml(data)
+    _write_settings_sidecar(settings)
+    return settings
 
 def load_settings():
     """
     Loads global settings from the settings.yaml file.
     If the file does not exist, returns default settings.
     """
-    if os.path.exists(SETTINGS_PATH):
-        try:
-            with open(SETTINGS_PATH, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
-        except yaml.YAMLError as e:
-            print(f"Error loading settings.yaml: {e}. Returning default settings.")
-            return get_default_settings()
-    return get_default_settings()
+    try:
+        return _load_cached(SETTINGS_PATH, _parse_settings)
+    except FileNotFoundError:
+        return get_default_settings()
+    except yaml.YAMLError as e:
+        print(f"Error loading settings.yaml: {e}. Returning default settings.")
+        return get_default_settings()
 
 def save_settings(settings_data):
     """
     Saves global settings to the settings.yaml file.
+    Returns True if the file was written, False otherwise.
     """
-    os.makedirs(CONFIG_DIR, exist_ok=True)
+    ensure_dir(CONFIG_DIR)
     try:
-        with open(SETTINGS_PATH, 'w', encoding='utf-8') as f:
-            yaml.dump(settings_data, f, indent=2)
+        _write_atomic(SETTINGS_PATH, yaml.dump(settings_data, Dumper=_YamlDumper, indent=2))
+        _CONFIG_CACHE.pop(SETTINGS_PATH, None)
+        # Written after the YAML, so it records the signature of the file just saved
+        _write_settings_sidecar(settings_data)
         print(f"Settings saved to: {SETTINGS_PATH}")
+        return True
     except Exception as e:
         print(f"Error saving settings.yaml: {e}")
+        return False
 
 def get_default_settings():
     """
@@ -48,6 +184,7 @@ def get_default_settings():
         "gui_theme": "light",
         "max_recent_files": 5,
         "playback_speed": 1.0,
+        "action_merge_gap": None,
         "subtitle_encoding": "utf-8"
     }
 
@@ -56,26 +193,154 @@ def load_filters():
     Loads filter settings from the filters.json file.
     If the file does not exist, returns default filters.
     """
-    if os.path.exists(FILTERS_PATH):
-        try:
-            with open(FILTERS_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"Error loading filters.json: {e}. Returning default filters.")
-            return get_default_filters()
-    return get_default_filters()
+    try:
+        return _load_cached(FILTERS_PATH, _json_loads)
+    except FileNotFoundError:
+        return get_default_filters()
+    except json.JSONDecodeError as e:
+        print(f"Error loading filters.json: {e}. Returning default filters.")
+        return get_default_filters()
 
 def save_filters(filters_data):
     """
     Saves filter settings to the filters.json file.
+    Returns True if the file was written, False otherwise.
     """
-    os.makedirs(CONFIG_DIR, exist_ok=True)
+    ensure_dir(CONFIG_DIR)
     try:
-        with open(FILTERS_PATH, 'w', encoding='utf-8') as f:
-            json.dump(filters_data, f, indent=2)
+        _write_atomic(FILTERS_PATH, json.dumps(filters_data, indent=2))
+        _CONFIG_CACHE.pop(FILTERS_PATH, None)
         print(f"Filters saved to: {FILTERS_PATH}")
+        return True
     except Exception as e:
         print(f"Error saving filters.json: {e}")
+        return False
+
+@functools.lru_cache(maxsize=32)
+def _build_profanity_regex(words, flags=re.IGNORECASE):
+    """Sorts, escapes and compiles a tuple of words; memoized so each word list is compiled once."""
+    # Sort by length descending to handle "hot" before "hotdog" if both are in list
+    word_list_sorted = sorted(words, key=len, reverse=True)
+    # Using \b for word boundaries. For example, "hell" will not match "hello".
+    pattern = r'\b(' + '|'.join(re.escape(word) for word in word_list_sorted) + r')\b'
+    return re.compile(pattern, flags)
+
+def compile_profanity_regex(word_list):
+    """
+    Compiles a profanity word list into a single case-insensitive,
+    whole-word regex alternation. Returns None for an empty list.
+    Repeated calls with the same words reuse the compiled pattern.
+    """
+    if not word_list:
+        return None
+    return _build_profanity_regex(tuple(word_list))
+
+def compile_ascii_profanity_regex(word_list):
+    """
+    Compiles the same alternation as compile_profanity_regex over the lowercased
+    words, without re.IGNORECASE, for searching ASCII text that was lowercased
+    first; that skips case folding at match time. Returns None for an empty list or
+    when a word is not ASCII, since IGNORECASE folding then differs from lower().
+    """
+    if not word_list or not all(word.isascii() for word in word_list):
+        return None
+    return _build_profanity_regex(tuple(word.lower() for word in word_list), 0)
+
+# Lowercased profanity word sets keyed by the word list they were built from
+_PROFANITY_WORD_SET_CACHE = {}
+# Aho-Corasick automatons keyed by lowercased word set
+_PROFANITY_AUTOMATON_CACHE = {}
+# First-character prefilters keyed by lowercased word set
+_PROFANITY_PREFILTER_CACHE = {}
+
+# Beyond this many distinct first characters nearly every line of dialogue contains
+# one of them, and the prefilter would only add a scan in front of the real search
+PROFANITY_PREFILTER_MAX_CHARS = 3
+
+def get_profanity_word_set(filters=None):
+    """
+    Returns the profanity word list of the given filters (by default those in
+    filters.json) as a frozenset of lowercased words, for O(1) membership tests.
+    The filters dict itself is left JSON-serializable.
+    """
+    if filters is None:
+        filters = load_filters()
+    key = tuple(filters.get('profanity', {}).get('word_list', []))
+    word_set = _PROFANITY_WORD_SET_CACHE.get(key)
+    if word_set is None:
+        word_set = _PROFANITY_WORD_SET_CACHE[key] = frozenset(word.lower() for word in key)
+    return word_set
+
+def get_profanity_regex(filters=None):
+    """
+    Returns the compiled profanity regex for the given filters (by default those
+    in filters.json), or None if the profanity filter is disabled or has no words.
+    Compiled through compile_profanity_regex(), so each word list is compiled only once.
+    """
+    if filters is None:
+        filters = load_filters()
+    profanity_settings = filters.get('profanity', {})
+    if not profanity_settings.get('enabled', False):
+        return None
+    return compile_profanity_regex(profanity_settings.get('word_list', []))
+
+def compile_profanity_automaton(word_set):
+    """
+    Builds an Aho-Corasick automaton over lowercased profanity words; each word maps
+    to its length. Returns None for an empty set, when pyahocorasick is not installed,
+    or when a word is not ASCII, since IGNORECASE folding then differs from lower().
+    """
+    if ahocorasick is None or not word_set or not all(word.isascii() for word in word_set):
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in word_set:
+        if word:
+            automaton.add_word(word, len(word))
+    automaton.make_automaton()
+    return automaton
+
+def get_profanity_automaton(filters=None):
+    """
+    Returns the Aho-Corasick automaton for the given filters (by default those in
+    filters.json), or None if the profanity filter is disabled, has no words, or
+    pyahocorasick is not installed. Each distinct set of words is built only once.
+    """
+    if filters is None:
+        filters = load_filters()
+    if not filters.get('profanity', {}).get('enabled', False):
+        return None
+    word_set = get_profanity_word_set(filters)
+    if word_set not in _PROFANITY_AUTOMATON_CACHE:
+        _PROFANITY_AUTOMATON_CACHE[word_set] = compile_profanity_automaton(word_set)
+    return _PROFANITY_AUTOMATON_CACHE[word_set]
+
+def compile_profanity_prefilter(word_set):
+    """
+    Compiles a case-insensitive character class of the first characters of the
+    profanity words. Text it does not match cannot contain any of the words, so the
+    full search can be skipped. Returns None for an empty set or when the words start
+    with more than PROFANITY_PREFILTER_MAX_CHARS distinct characters.
+    """
+    first_chars = {word[0] for word in word_set if word}
+    if not first_chars or len(first_chars) > PROFANITY_PREFILTER_MAX_CHARS:
+        return None
+    # Same IGNORECASE folding as the profanity regex, so no possible match is skipped
+    return re.compile('[' + ''.join(re.escape(char) for char in sorted(first_chars)) + ']', re.IGNORECASE)
+
+def get_profanity_prefilter(filters=None):
+    """
+    Returns the first-character prefilter for the given filters (by default those in
+    filters.json), or None if the profanity filter is disabled or a prefilter would not
+    pay off. Each distinct set of words is compiled only once.
+    """
+    if filters is None:
+        filters = load_filters()
+    if not filters.get('profanity', {}).get('enabled', False):
+        return None
+    word_set = get_profanity_word_set(filters)
+    if word_set not in _PROFANITY_PREFILTER_CACHE:
+        _PROFANITY_PREFILTER_CACHE[word_set] = compile_profanity_prefilter(word_set)
+    return _PROFANITY_PREFILTER_CACHE[word_set]
 
 def get_default_filters():
     """
@@ -103,18 +368,26 @@ def get_default_filters():
 # Ensure config directory and default files exist on first run
 def initialize_config_files():
     """Ensures config directory and default filter/settings files exist."""
-    os.makedirs(CONFIG_DIR, exist_ok=True)
+    ensure_dir(CONFIG_DIR)
+    existing = list_dir_names(CONFIG_DIR)
 
-    if not os.path.exists(FILTERS_PATH):
+    if os.path.basename(FILTERS_PATH) not in existing:
         print("filters.json not found. Creating with default values.")
         save_filters(get_default_filters())
     
-    if not os.path.exists(SETTINGS_PATH):
+    if os.path.basename(SETTINGS_PATH) not in existing:
         print("settings.yaml not found. Creating with default values.")
         save_settings(get_default_settings())
 
-# Initialize config files when this module is imported
-initialize_config_files()
+def ensure_workspace():
+    """
+    Ensures the workspace directories and default config files exist.
+    Safe to call repeatedly; call it from code paths that are about to do real work,
+    not at import time.
+    """
+    for directory in WORKSPACE_DIRS:
+        ensure_dir(directory)
+    initialize_config_files()
 
 if __name__ == '__main__':
     # Example usage for testing this module
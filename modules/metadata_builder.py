@@ -1,12 +1,22 @@
 # CleanMedia/modules/metadata_builder.py
 
+import concurrent.futures
+import heapq
 import json
 import os
 import time
-from datetime import timedelta
+from itertools import islice
+from operator import itemgetter
+from pathlib import PurePath
+
+# orjson is an optional, much faster JSON encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import from the centralized config manager
-from modules.config_manager import load_filters
+from modules.config_manager import load_filters, get_profanity_automaton, ensure_dir
 
 # Assuming these modules exist and have the specified functions
 # We'll import them inside build_media_metadata to avoid circular imports
@@ -14,16 +24,36 @@ from modules.config_manager import load_filters
 subtitle_parser = None
 video_scanner = None
 
-def format_timedelta(td):
-    """Formats a timedelta object into HH:MM:SS.mmm string."""
-    total_seconds = int(td.total_seconds())
-    milliseconds = int((td.total_seconds() * 1000) % 1000)
+# Parsed subtitles are cached in this subdirectory of the output directory
+SUBTITLE_CACHE_DIRNAME = '.subtitle_cache'
+
+def format_seconds(seconds):
+    """Formats a number of seconds into HH:MM:SS.mmm string without building a timedelta."""
+    total_ms = int(seconds * 1000)
+    total_seconds, milliseconds = divmod(total_ms, 1000)
     hours, remainder = divmod(total_seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
     return f"{hours:02}:{minutes:02}:{seconds:02}.{milliseconds:03}"
 
+def format_timedelta(td):
+    """Formats a timedelta object into HH:MM:SS.mmm string."""
+    return format_seconds(td.total_seconds())
+
 
-def build_media_metadata(video_path, subtitle_path=None, output_dir='movie/metadata', log_callback=None):
+def dump_metadata_json(metadata, pretty=False):
+    """
+    Serializes metadata to UTF-8 JSON bytes, compact by default.
+    Uses orjson when installed, otherwise the stdlib json module.
+    """
+    if orjson is not None:
+        return orjson.dumps(metadata, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(metadata, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(metadata, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def build_media_metadata(video_path, subtitle_path=None, output_dir='movie/metadata', log_callback=None,
+                         profanity_regex=None, pretty_json=False, write_preview=True,
+                         video_exists=None, subtitle_exists=None, filters=None):
     """
     Builds a comprehensive metadata JSON for a media file, combining
     subtitle filtering results and video scanning results.
@@ -33,9 +63,23 @@ def build_media_metadata(video_path, subtitle_path=None, output_dir='movie/metad
         subtitle_path (str, optional): Path to the input subtitle file (SRT).
         output_dir (str, optional): Directory to save metadata and preview files.
         log_callback (callable, optional): Function to call for logging messages to GUI.
+        profanity_regex (re.Pattern, optional): Custom profanity pattern passed through to
+            the subtitle parser. By default the parser matches the filters' word list, with
+            get_profanity_automaton() when pyahocorasick is installed; the automaton is not
+            used when a pattern is given.
+        pretty_json (bool, optional): Indent the metadata JSON for debugging instead of
+            writing it compactly.
+        write_preview (bool, optional): Build and save the human-readable
+            _preview.txt report. Headless callers can pass False to skip it.
+        video_exists (bool, optional): Whether video_path is an existing file, if the caller
+            already checked. Checked here when None.
+        subtitle_exists (bool, optional): Same as video_exists, for subtitle_path.
+        filters (dict, optional): Filter settings the caller already holds; it is only read.
+            Defaults to load_filters(), so batch callers can load them once and reuse them.
 
     Returns:
-        dict: The generated metadata dictionary.
+        dict: The generated metadata dictionary. When every filter is disabled it is
+            returned with no actions and nothing is written to output_dir.
     """
     def log(message):
         if log_callback:
@@ -47,142 +91,264 @@ def build_media_metadata(video_path, subtitle_path=None, output_dir='movie/metad
     if subtitle_path:
         log(f"Using subtitles from: {subtitle_path}")
 
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Load filter settings from the centralized manager
-    filters = load_filters()
+    # Load filter settings from the centralized manager unless the caller passed them in
+    if filters is None:
+        filters = load_filters()
     if not filters:
         log("Warning: Could not load filters.json. Proceeding with default/empty filters.")
 
-    media_filename = os.path.splitext(os.path.basename(video_path))[0]
+    # Parse the video path once; its name and stem label the metadata and both output files
+    video = PurePath(video_path)
+    media_name = video.name
+    media_filename = video.stem
     metadata_json_path = os.path.join(output_dir, f"{media_filename}.json")
     preview_txt_path = os.path.join(output_dir, f"{media_filename}_preview.txt")
 
+    # Read each filter's enabled flag once; they drive the metadata, the preview header
+    # and which scans run
+    profanity_enabled = bool(filters.get('profanity', {}).get('enabled', False))
+    nudity_enabled = bool(filters.get('nudity', {}).get('enabled', False))
+    violence_enabled = bool(filters.get('violence', {}).get('enabled', False))
+
     # Initialize metadata structure
     metadata = {
-        "media_file": os.path.basename(video_path),
+        "media_file": media_name,
         "subtitle_file": os.path.basename(subtitle_path) if subtitle_path else None,
         "processed_at": time.strftime("%Y-%m-%d %H:%M:%S"),
         "filters_applied": {
-            "profanity": filters.get('profanity', {}).get('enabled', False),
-            "nudity": filters.get('nudity', {}).get('enabled', False),
-            "violence": filters.get('violence', {}).get('enabled', False)
+            "profanity": profanity_enabled,
+            "nudity": nudity_enabled,
+            "violence": violence_enabled
         },
         "actions": [] # This will store all identified mute/skip/replace actions
     }
 
-    preview_log_lines = [f"CleanMedia Processing Report for: {metadata['media_file']}\n"]
-    preview_log_lines.append(f"Processed At: {metadata['processed_at']}\n")
-    preview_log_lines.append(f"Filters Enabled: Profanity={metadata['filters_applied']['profanity']}, "
-                             f"Nudity={metadata['filters_applied']['nudity']}, "
-                             f"Violence={metadata['filters_applied']['violence']}\n")
-    preview_log_lines.append("-" * 50 + "\n")
-
-    # 1. Process Subtitles for Profanity
-    subtitle_actions = []
-    profanity_enabled = filters.get('profanity', {}).get('enabled', False)
-    if subtitle_path and os.path.exists(subtitle_path) and profanity_enabled:
+    # With every filter off there is nothing to detect; skip the scans and all disk writes
+    if not (profanity_enabled or nudity_enabled or violence_enabled):
+        log("All filters are disabled. Nothing to process; no metadata or preview written.")
+        return metadata
+
+    # Ensure output directory exists
+    ensure_dir(output_dir)
+
+    if subtitle_exists is None:
+        subtitle_exists = bool(subtitle_path) and os.path.isfile(subtitle_path)
+    if video_exists is None:
+        video_exists = os.path.isfile(video_path)
+    run_subtitles = subtitle_exists and profanity_enabled
+    run_video = video_exists and (nudity_enabled or violence_enabled)
+
+    global subtitle_parser, video_scanner
+    if run_subtitles:
         log("Processing subtitles for profanity...")
-        global subtitle_parser
         if subtitle_parser is None:
             from modules.subtitle_parser import parse_and_filter_subtitles
             subtitle_parser = parse_and_filter_subtitles
-
-        _, filtered_subs, sub_actions = subtitle_parser(subtitle_path, filters, log_callback)
-        subtitle_actions.extend(sub_actions)
-        metadata['actions'].extend(sub_actions)
-
-        preview_log_lines.append("Subtitle Profanity Detections:\n")
-        if sub_actions:
-            for action in sub_actions:
-                start_hms = format_timedelta(timedelta(seconds=action['start_time']))
-                end_hms = format_timedelta(timedelta(seconds=action['end_time']))
-                preview_log_lines.append(f"  [{start_hms} - {end_hms}] Type: {action['type']} "
-                                         f"Original: '{action['original_text']}' -> Action: {action['action_taken']}\n")
-        else:
-            preview_log_lines.append("  No profanity detected in subtitles.\n")
-        preview_log_lines.append("\n")
-    elif subtitle_path and not os.path.exists(subtitle_path):
+        # Cached per word list; None without pyahocorasick. A caller's own pattern takes its
+        # place, since the parser would prefer the automaton over it. Without either matcher
+        # the parser compiles the (cached) word-list pattern and its fast paths itself
+        profanity_automaton = get_profanity_automaton(filters) if profanity_regex is None else None
+    elif subtitle_path and not subtitle_exists:
         log(f"Subtitle file not found at {subtitle_path}. Skipping subtitle processing.")
-        preview_log_lines.append(f"Subtitle file not found at {subtitle_path}. Subtitle processing skipped.\n\n")
     else:
         log("Subtitle path not provided or profanity filter disabled. Skipping subtitle processing.")
-        preview_log_lines.append("Subtitle processing skipped (no subtitle provided or filter disabled).\n\n")
 
-    # 2. Scan Video for Nudity/Violence
-    video_content_actions = []
-    nudity_enabled = filters.get('nudity', {}).get('enabled', False)
-    violence_enabled = filters.get('violence', {}).get('enabled', False)
-
-    if os.path.exists(video_path) and (nudity_enabled or violence_enabled):
+    if run_video:
         log("Scanning video for nudity and violence...")
-        global video_scanner
         if video_scanner is None:
             from modules.video_scanner import scan_video_for_content
             video_scanner = scan_video_for_content
-
-        video_actions = video_scanner(video_path, filters, log_callback)
-        video_content_actions.extend(video_actions)
-        metadata['actions'].extend(video_actions)
-
-        preview_log_lines.append("Video Content Detections (Nudity/Violence):\n")
-        if video_actions:
-            # Group consecutive actions of the same type for better readability
-            grouped_actions = []
-            if video_actions:
-                current_group = None
-                # Sort actions by start time to ensure correct grouping
-                sorted_video_actions = sorted(video_actions, key=lambda x: x['start_time'])
-                for action in sorted_video_actions:
-                    # Merge if same type and overlaps or is very close (e.g., within 1 second)
-                    if current_group and action['type'] == current_group['type'] and \
-                       action['start_time'] <= current_group['end_time'] + 1:
-                        current_group['end_time'] = max(current_group['end_time'], action['end_time'])
-                    else:
-                        if current_group:
-                            grouped_actions.append(current_group)
-                        current_group = action.copy()
-                if current_group:
-                    grouped_actions.append(current_group)
-
-            for action in grouped_actions:
-                start_hms = format_timedelta(timedelta(seconds=action['start_time']))
-                end_hms = format_timedelta(timedelta(seconds=action['end_time']))
-                preview_log_lines.append(f"  [{start_hms} - {end_hms}] Type: {action['type']} "
-                                         f"Confidence: {action.get('confidence', 'N/A'):.2f} "
-                                         f"Suggested Action: {action.get('action_suggestion', 'N/A')}\n")
-        else:
-            preview_log_lines.append("  No nudity or violence detected in video.\n")
-        preview_log_lines.append("\n")
-    elif not os.path.exists(video_path):
+    elif not video_exists:
         log(f"Video file not found at {video_path}. Skipping video scanning.")
-        preview_log_lines.append(f"Video file not found at {video_path}. Video scanning skipped.\n\n")
     else:
         log("Nudity/Violence filters disabled or no video provided. Skipping video scanning.")
-        preview_log_lines.append("Video scanning skipped (filters disabled or no video provided).\n\n")
 
-    # Sort all actions by start_time for chronological processing
-    metadata['actions'].sort(key=lambda x: x['start_time'])
+    # Subtitle parsing and video scanning are independent, so run them concurrently
+    # when both are needed; the overlap is the cv2.VideoCapture open/probe of the video
+    # with the subtitle file read, both of which release the GIL
+    sub_actions = []
+    video_actions = []
+    subtitle_cache_dir = os.path.join(output_dir, SUBTITLE_CACHE_DIRNAME)
+    if run_subtitles and run_video:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            sub_future = executor.submit(subtitle_parser, subtitle_path, filters, log_callback,
+                                         profanity_regex=profanity_regex,
+                                         profanity_automaton=profanity_automaton, keep_originals=False,
+                                         cache_dir=subtitle_cache_dir)
+            video_future = executor.submit(video_scanner, video_path, filters, log_callback)
+            sub_actions = sub_future.result()[2]
+            video_actions = video_future.result()
+    elif run_subtitles:
+        sub_actions = subtitle_parser(subtitle_path, filters, log_callback, profanity_regex=profanity_regex,
+                                      profanity_automaton=profanity_automaton, keep_originals=False,
+                                      cache_dir=subtitle_cache_dir)[2]
+    elif run_video:
+        video_actions = video_scanner(video_path, filters, log_callback)
+
+    # Subtitle actions follow the cue order of the file, which need not be chronological;
+    # the sort is linear when it already is. Video actions follow frame order, so a
+    # linear merge then yields all actions in chronological order
+    sub_actions.sort(key=itemgetter('start_time'))
+    metadata['actions'] = list(heapq.merge(sub_actions, video_actions, key=itemgetter('start_time')))
 
     # Save metadata JSON
     try:
-        with open(metadata_json_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=4)
+        # Render first and write once; json.dump would issue one small write per token
+        payload = dump_metadata_json(metadata, pretty=pretty_json)
+        with open(metadata_json_path, 'wb') as f:
+            f.write(payload)
         log(f"Metadata saved to: {metadata_json_path}")
     except Exception as e:
         log(f"Error saving metadata JSON: {e}")
 
-    # Save human-readable preview log
-    try:
-        with open(preview_txt_path, 'w', encoding='utf-8') as f:
-            f.writelines(preview_log_lines)
-        log(f"Preview log saved to: {preview_txt_path}")
-    except Exception as e:
-        log(f"Error saving preview log: {e}")
+    # Save human-readable preview log, streamed through a large buffer as it is
+    # formatted rather than collected in a list first
+    if write_preview:
+        try:
+            with open(preview_txt_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                write = f.write
+                write(f"CleanMedia Processing Report for: {metadata['media_file']}\n")
+                write(f"Processed At: {metadata['processed_at']}\n")
+                write(f"Filters Enabled: Profanity={profanity_enabled}, "
+                      f"Nudity={nudity_enabled}, "
+                      f"Violence={violence_enabled}\n")
+                write("-" * 50 + "\n")
+
+                # 1. Subtitle Profanity results
+                if run_subtitles:
+                    write("Subtitle Profanity Detections:\n")
+                    if sub_actions:
+                        # Format the whole section in one join and hand it over in one write
+                        write("".join(
+                            f"  [{format_seconds(action['start_time'])} - {format_seconds(action['end_time'])}] "
+                            f"Type: {action['type']} "
+                            f"Original: '{action['original_text']}' -> Action: {action['action_taken']}\n"
+                            for action in sub_actions))
+                    else:
+                        write("  No profanity detected in subtitles.\n")
+                    write("\n")
+                elif subtitle_path and not subtitle_exists:
+                    write(f"Subtitle file not found at {subtitle_path}. Subtitle processing skipped.\n\n")
+                else:
+                    write("Subtitle processing skipped (no subtitle provided or filter disabled).\n\n")
+
+                # 2. Video Nudity/Violence results
+                if run_video:
+                    write("Video Content Detections (Nudity/Violence):\n")
+                    if video_actions:
+                        # Group consecutive actions of the same type for better readability.
+                        # The scanner emits actions in frame order, so one sweep suffices: the open
+                        # group lives in locals and is emitted as a
+                        # (type, start_time, end_time, confidence, action_suggestion) tuple when it closes.
+                        grouped_actions = []
+                        first_action = video_actions[0]
+                        group_type = first_action['type']
+                        group_start = first_action['start_time']
+                        group_end = first_action['end_time']
+                        group_confidence = first_action.get('confidence', 'N/A')
+                        group_suggestion = first_action.get('action_suggestion', 'N/A')
+                        for action in islice(video_actions, 1, None):
+                            action_type = action['type']
+                            start_time = action['start_time']
+                            # Merge if same type and overlaps or is very close (e.g., within 1 second)
+                            if action_type == group_type and start_time <= group_end + 1:
+                                if action['end_time'] > group_end:
+                                    group_end = action['end_time']
+                                continue
+                            grouped_actions.append((group_type, group_start, group_end, group_confidence, group_suggestion))
+                            group_type = action_type
+                            group_start = start_time
+                            group_end = action['end_time']
+                            group_confidence = action.get('confidence', 'N/A')
+                            group_suggestion = action.get('action_suggestion', 'N/A')
+                        grouped_actions.append((group_type, group_start, group_end, group_confidence, group_suggestion))
+
+                        write("".join(
+                            f"  [{format_seconds(start_time)} - {format_seconds(end_time)}] Type: {action_type} "
+                            f"Confidence: {confidence:.2f} "
+                            f"Suggested Action: {suggestion}\n"
+                            for action_type, start_time, end_time, confidence, suggestion in grouped_actions))
+                    else:
+                        write("  No nudity or violence detected in video.\n")
+                    write("\n")
+                elif not video_exists:
+                    write(f"Video file not found at {video_path}. Video scanning skipped.\n\n")
+                else:
+                    write("Video scanning skipped (filters disabled or no video provided).\n\n")
+            log(f"Preview log saved to: {preview_txt_path}")
+        except Exception as e:
+            log(f"Error saving preview log: {e}")
 
     return metadata
 
+def _init_batch_worker():
+    """Imports the processing backends once per worker process, before its first job."""
+    global subtitle_parser, video_scanner
+    try:
+        from modules.subtitle_parser import parse_and_filter_subtitles
+        subtitle_parser = parse_and_filter_subtitles
+    except ImportError:
+        pass # Reported by the job that actually needs it
+    try:
+        from modules.video_scanner import scan_video_for_content
+        video_scanner = scan_video_for_content
+    except ImportError:
+        pass
+
+def _build_batch_item(video_path, subtitle_path, output_dir, options):
+    """Runs build_media_metadata in a worker, collecting its log lines instead of using a callback."""
+    logs = []
+    metadata = build_media_metadata(video_path, subtitle_path, output_dir, log_callback=logs.append, **options)
+    return metadata, logs
+
+def build_media_metadata_batch(media_pairs, output_dir='movie/metadata', max_workers=None, log_callback=None,
+                               **options):
+    """
+    Builds metadata for several media files in parallel worker processes.
+    Files are independent, so each (video, subtitle) pair is a separate
+    build_media_metadata job and CPU-heavy video scans run on separate cores.
+
+    Args:
+        media_pairs (iterable): (video_path, subtitle_path) pairs; subtitle_path may be None.
+        output_dir (str, optional): Directory to save metadata and preview files.
+        max_workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        log_callback (callable, optional): Receives each job's log lines as that job completes.
+        **options: Further build_media_metadata keyword arguments (e.g. write_preview).
+            Filters are loaded once here unless passed as filters=.
+
+    Returns:
+        list: The metadata dictionaries in input order (None for a job that failed).
+    """
+    def log(message):
+        if log_callback:
+            log_callback(message)
+        else:
+            print(message)
+
+    media_pairs = list(media_pairs)
+    if not media_pairs:
+        return []
+    if options.get('filters') is None:
+        options['filters'] = load_filters()
+
+    results = [None] * len(media_pairs)
+    workers = min(max_workers or os.cpu_count() or 1, len(media_pairs))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as executor:
+        futures = {
+            executor.submit(_build_batch_item, video_path, subtitle_path, output_dir, options): index
+            for index, (video_path, subtitle_path) in enumerate(media_pairs)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            try:
+                results[index], logs = future.result()
+            except Exception as e:
+                log(f"Error building metadata for {media_pairs[index][0]}: {e}")
+                continue
+            for message in logs:
+                log(message)
+    return results
+
 if __name__ == '__main__':
     # Example usage for testing this module
     dummy_video = 'movie/input/sample_movie.mp4'
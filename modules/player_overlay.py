@@ -1,12 +1,23 @@
 # CleanMedia/modules/player_overlay.py
 
+import functools
 import json
 import time
 import os
-import yaml
+import sys
+from array import array
+from bisect import bisect_right
+from operator import itemgetter, le
 
-# Import from the centralized config manager
-from modules.config_manager import load_settings
+# orjson is an optional, much faster JSON parser
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# config_manager (and PyYAML with it) is imported on first use of
+# MediaPlaybackController.settings, not when this module is imported
+load_settings = None
 
 # The actual vlc library cannot be installed/used in this environment,
 # so we will keep the simulation.
@@ -16,33 +27,139 @@ from modules.config_manager import load_settings
 #     print("Warning: python-vlc not installed. Real-time playback control will be simulated.")
 #     vlc = None # Set vlc to None if import fails
 
+def _intern_action_strings(metadata):
+    """
+    Interns each action's type and action_suggestion in place. A metadata file
+    repeats a handful of these values across every action; interned, they share
+    one object each and compare by identity during dispatch.
+    """
+    if not isinstance(metadata, dict):
+        return
+    intern = sys.intern
+    for action in metadata.get('actions', []):
+        for key in ('type', 'action_suggestion'):
+            value = action.get(key)
+            if type(value) is str:
+                action[key] = intern(value)
+
+# Suggestions for which one longer span does the same as several short ones; others such as
+# replace_text carry per-action details (original and replacement text) that merging would drop
+MERGEABLE_SUGGESTIONS = frozenset({'mute_audio', 'skip_scene'})
+
+def merge_adjacent_actions(actions, gap):
+    """
+    Merges consecutive actions (sorted by start_time) of the same type and suggestion
+    whose spans overlap or are at most gap seconds apart, so e.g. two swear words in
+    one line become a single mute. Only suggestions in MERGEABLE_SUGGESTIONS are merged.
+    Merged actions are new dicts; the given ones are left unchanged.
+    A gap that is not a number (such as None) or is negative disables merging.
+    """
+    if isinstance(gap, bool) or not isinstance(gap, (int, float)) or gap < 0:
+        return list(actions)
+    merged = []
+    last = None
+    last_is_copy = False
+    for action in actions:
+        if (last is not None and action['start_time'] <= last['end_time'] + gap
+                and last.get('action_suggestion') in MERGEABLE_SUGGESTIONS
+                and action.get('type') == last.get('type')
+                and action.get('action_suggestion') == last.get('action_suggestion')):
+            if not last_is_copy:
+                last = merged[-1] = dict(last)
+                last_is_copy = True
+            if action['end_time'] > last['end_time']:
+                last['end_time'] = action['end_time']
+            if 'matched_word' in last and 'matched_word' in action:
+                last['matched_word'] = f"{last['matched_word']}, {action['matched_word']}"
+            continue
+        merged.append(action)
+        last = action
+        last_is_copy = False
+    return merged
+
 class MediaPlaybackController:
     def __init__(self, video_path, metadata_path):
+        # Metadata, actions and settings are cached properties loaded on first use
+        # (at the latest when play() starts); construction only records the paths
         self.video_path = video_path
-        self.metadata = self._load_metadata(metadata_path)
-        self.settings = load_settings()
+        self.metadata_path = metadata_path
         self.player = None
         self.instance = None # Placeholder for vlc.Instance()
         self.current_action_index = 0
         self.last_action_time = -1 # To prevent re-triggering actions in the same second
         self.log_callback = None # Will be set by the caller (GUI)
-
+        self._sim_start = None # Monotonic start of the running simulation, if any
+
+    @functools.cached_property
+    def metadata(self):
+        """The parsed metadata JSON, or None if it could not be loaded."""
+        metadata = self._load_metadata(self.metadata_path)
+        if not metadata:
+            self._log(f"Error: Could not load metadata from {self.metadata_path}. Playback will be unfiltered.")
+        return metadata
+
+    @functools.cached_property
+    def raw_actions(self):
+        """The metadata's actions sorted by start_time, as stored in the file."""
+        # Ensure actions are sorted by start_time. The builder writes them in order, so a
+        # linear check avoids the sort for its files and still sorts hand-edited ones
         if not self.metadata:
-            self._log(f"Error: Could not load metadata from {metadata_path}. Playback will be unfiltered.")
-        
-        # Ensure actions are sorted by start_time
-        self.actions = sorted(self.metadata.get('actions', []), key=lambda x: x['start_time']) if self.metadata else []
-        self._log(f"Loaded {len(self.actions)} actions for media: {os.path.basename(video_path)}")
+            return []
+        actions = self.metadata.get('actions', [])
+        starts = list(map(itemgetter('start_time'), actions))
+        if not all(map(le, starts, starts[1:])):
+            actions = sorted(actions, key=itemgetter('start_time'))
+        return actions
+
+    @functools.cached_property
+    def actions(self):
+        """The actions played back: raw_actions, with adjacent ones of the same kind merged if enabled."""
+        raw_actions = self.raw_actions
+        # Merging is opt-in; without a numeric action_merge_gap the file's actions play back
+        # unchanged. An empty settings.yaml loads as None, so fall back to no settings
+        gap = (self.settings or {}).get('action_merge_gap') if raw_actions else None
+        actions = merge_adjacent_actions(raw_actions, gap)
+        message = f"Loaded {len(raw_actions)} actions for media: {os.path.basename(self.video_path)}"
+        if len(actions) != len(raw_actions):
+            message += f" ({len(actions)} after merging adjacent ones)"
+        self._log(message)
+        return actions
+
+    # Contiguous start/end times for bisecting by playback time without touching the dicts
+    @functools.cached_property
+    def _starts(self):
+        return array('d', [action['start_time'] for action in self.actions])
+
+    @functools.cached_property
+    def _ends(self):
+        return array('d', [action['end_time'] for action in self.actions])
+
+    @functools.cached_property
+    def settings(self):
+        """Global settings, loaded from settings.yaml the first time they are needed."""
+        global load_settings
+        if load_settings is None:
+            from modules.config_manager import load_settings
+        return load_settings()
+
+    def prefetch(self):
+        """Loads the metadata and prepares the action lookup now instead of on first use."""
+        self._starts
+        self._ends
 
     def _load_metadata(self, metadata_path):
         """Loads media metadata from a JSON file."""
         if os.path.exists(metadata_path):
             try:
-                with open(metadata_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except json.JSONDecodeError as e:
+                # Parse the raw bytes; orjson skips the intermediate str decode
+                with open(metadata_path, 'rb') as f:
+                    data = f.read()
+                metadata = orjson.loads(data) if orjson is not None else json.loads(data)
+            except json.JSONDecodeError as e: # orjson.JSONDecodeError subclasses it
                 self._log(f"Error decoding metadata JSON from {metadata_path}: {e}")
                 return None
+            _intern_action_strings(metadata)
+            return metadata
         return None
 
     def _log(self, message):
@@ -71,6 +188,7 @@ class MediaPlaybackController:
             log_callback (callable, optional): Function to call for logging messages to GUI.
         """
         self.log_callback = log_callback
+        self.prefetch() # Load errors and the action count now reach log_callback
         self.initialize_player()
         if self.player == "simulated_player":
             self._log("\n--- Simulating Media Playback ---")
@@ -86,7 +204,8 @@ class MediaPlaybackController:
         # In a real scenario, you'd get this from the VLC player or video analysis.
         simulated_duration = 60 # 1 minute for simulation, can be adjusted for testing
 
-        start_time = time.time()
+        # Monotonic-clock anchor of playback time 0; skip actions move it back to jump ahead
+        self._sim_start = time.monotonic()
         current_playback_time = 0.0
 
         # Find the max end time from actions to make simulation duration more realistic
@@ -94,21 +213,30 @@ class MediaPlaybackController:
             max_action_end_time = max(action['end_time'] for action in self.actions)
             simulated_duration = max(simulated_duration, max_action_end_time + 5) # Add 5 seconds buffer
 
+        last_logged_second = -1
         while current_playback_time < simulated_duration:
-            elapsed_real_time = time.time() - start_time
+            elapsed_real_time = time.monotonic() - self._sim_start
             current_playback_time = elapsed_real_time # 1:1 simulation of time
 
             # Check for actions
             self._check_and_apply_actions(current_playback_time)
 
-            # Update console/log less frequently to avoid excessive output
-            if int(current_playback_time * 10) % 10 == 0: # Update every second
+            # Update console/log once per second of playback to avoid excessive output
+            second = int(current_playback_time)
+            if second != last_logged_second:
+                last_logged_second = second
                 self._log(f"Simulating Playback: {current_playback_time:.1f}s / {simulated_duration:.1f}s")
-            
-            time.sleep(0.1) # Simulate frame rate / update interval
 
             if current_playback_time >= simulated_duration:
                 break
+
+            # Instead of polling every 100ms, sleep until the next action starts or the
+            # next progress update is due, whichever comes first
+            next_wake = min(second + 1, simulated_duration)
+            if self.current_action_index < len(self._starts):
+                next_wake = min(next_wake, self._starts[self.current_action_index])
+            # The floor keeps an action held back by the re-trigger epsilon from busy-looping
+            time.sleep(max(0.01, next_wake - (time.monotonic() - self._sim_start)))
         self._log("\nSimulation Finished.")
 
     # def _monitor_playback(self):
@@ -127,79 +255,94 @@ class MediaPlaybackController:
         if current_playback_time <= self.last_action_time + 0.05:
             return
 
-        # Iterate through actions from the current_action_index to optimize
-        while self.current_action_index < len(self.actions):
-            action = self.actions[self.current_action_index]
-            # If current time is within the action's active window
-            if action['start_time'] <= current_playback_time < action['end_time']:
-                self._apply_action(action, current_playback_time)
+        # Actions before current_action_index were applied or expired on earlier checks;
+        # bisect finds where the not-yet-started ones begin, so only actions that started
+        # since the last check are visited. All of them that are still active are applied,
+        # including overlapping ones.
+        started = bisect_right(self._starts, current_playback_time)
+        for index in range(self.current_action_index, started):
+            if current_playback_time < self._ends[index]:
+                self._apply_action(self.actions[index], current_playback_time)
                 self.last_action_time = current_playback_time # Mark action as applied at this time
-                # We might have multiple actions starting at the same time or overlapping,
-                # so don't increment index immediately if more overlap could occur.
-                # For simplicity here, we'll process one and then move to the next.
-                self.current_action_index += 1 
-                return # Only apply one action per check interval to avoid overlapping issues
-            elif action['start_time'] > current_playback_time:
-                # Actions are sorted, so if the current action is in the future,
-                # no need to check further for this time step.
-                break 
-            else: # current_playback_time is past this action's end_time, move to next
-                self.current_action_index += 1
+        if started > self.current_action_index:
+            self.current_action_index = started
 
 
+    def _skip_simulation_to(self, end_time, current_playback_time):
+        """
+        Jumps simulated playback ahead to end_time by moving the simulation's start
+        anchor back, so the next tick reads the later time instead of sleeping through the scene.
+        """
+        simulated_skip_duration = end_time - current_playback_time
+        if simulated_skip_duration > 0 and self._sim_start is not None:
+            self._sim_start -= simulated_skip_duration
+
     def _apply_action(self, action, current_playback_time):
         """Applies a specific filtering action."""
+        # Read every field once here; handlers get them as arguments instead of re-fetching
         action_type = action.get("type")
-        start_time = action.get("start_time")
-        end_time = action.get("end_time")
-        action_suggestion = action.get("action_suggestion", action.get("action_taken", "no_specific_action")) # Use action_taken for profanity
+        start_time = action["start_time"] # Required: the actions list is bisected on it
+        end_time = action["end_time"]
+        try:
+            action_suggestion = action["action_suggestion"]
+        except KeyError:
+            action_suggestion = action.get("action_taken", "no_specific_action") # Use action_taken for profanity
 
         self._log(f"\n--- Applying Action [{action_type}] at {current_playback_time:.2f}s "
                   f"(Duration: {end_time-start_time:.2f}s) ---")
 
-        if action_type == "profanity_mute":
-            # Action suggestion from filters.json (mute_audio or replace_text)
-            if action_suggestion == "mute_audio":
-                # if self.player and vlc:
-                #     self.player.audio_set_volume(0) # Mute audio
-                # else:
-                self._log(f"  [SIMULATED] Muting audio for profanity: '{action.get('matched_word')}'")
-                # In real scenario, would schedule unmute after end_time
-            elif action_suggestion == "replace_text":
-                self._log(f"  [SIMULATED] Replacing subtitle text: '{action.get('original_text')}' -> '{action.get('action_taken')}'")
-            else:
-                 self._log(f"  [SIMULATED] Profanity detected, but specific action '{action_suggestion}' is not simulated for player.")
-        elif action_type == "nudity_detection":
-            if action_suggestion == "blur_region":
-                self._log(f"  [SIMULATED] Applying blur effect for nudity from {start_time:.2f}s to {end_time:.2f}s.")
-            elif action_suggestion == "skip_scene":
-                self._log(f"  [SIMULATED] Skipping nudity scene from {start_time:.2f}s to {end_time:.2f}s. (Simulating jump)")
-                # if self.player and vlc:
-                #     self.player.set_time(int(end_time * 1000)) # Jump to end of scene
-                # Update current_playback_time in simulation to skip ahead
-                # This affects the simulation loop's current time directly.
-                simulated_skip_duration = end_time - current_playback_time
-                if simulated_skip_duration > 0:
-                    global_start_time = time.time() - current_playback_time
-                    time.sleep(simulated_skip_duration) # Simulate delay of skipping
-                    # current_playback_time will be recalculated based on real elapsed time
-            else:
-                self._log(f"  [SIMULATED] Nudity detected, suggested action: {action_suggestion}")
-        elif action_type == "violence_detection":
-            if action_suggestion == "skip_scene":
-                self._log(f"  [SIMULATED] Skipping violence scene from {start_time:.2f}s to {end_time:.2f}s. (Simulating jump)")
-                simulated_skip_duration = end_time - current_playback_time
-                if simulated_skip_duration > 0:
-                    global_start_time = time.time() - current_playback_time
-                    time.sleep(simulated_skip_duration)
-            elif action_suggestion == "mute_audio":
-                 self._log(f"  [SIMULATED] Muting audio for violence from {start_time:.2f}s to {end_time:.2f}s.")
-            else:
-                self._log(f"  [SIMULATED] Violence detected, suggested action: {action_suggestion}")
-        else:
-            self._log(f"  [SIMULATED] Unknown action type: {action_type}")
+        # One dict lookup picks the handler for the action type
+        handler = self._ACTION_HANDLERS.get(action_type, MediaPlaybackController._apply_unknown)
+        handler(self, action, action_suggestion, start_time, end_time, current_playback_time)
         self._log("-" * 50)
 
+    def _apply_profanity(self, action, action_suggestion, start_time, end_time, current_playback_time):
+        """Simulates the mute/replace action for a profanity match."""
+        # Action suggestion from filters.json (mute_audio or replace_text)
+        if action_suggestion == "mute_audio":
+            # if self.player and vlc:
+            #     self.player.audio_set_volume(0) # Mute audio
+            # else:
+            self._log(f"  [SIMULATED] Muting audio for profanity: '{action.get('matched_word')}'")
+            # In real scenario, would schedule unmute after end_time
+        elif action_suggestion == "replace_text":
+            self._log(f"  [SIMULATED] Replacing subtitle text: '{action.get('original_text')}' -> '{action.get('action_taken')}'")
+        else:
+            self._log(f"  [SIMULATED] Profanity detected, but specific action '{action_suggestion}' is not simulated for player.")
+
+    def _apply_nudity(self, action, action_suggestion, start_time, end_time, current_playback_time):
+        """Simulates the blur/skip action for a nudity detection."""
+        if action_suggestion == "blur_region":
+            self._log(f"  [SIMULATED] Applying blur effect for nudity from {start_time:.2f}s to {end_time:.2f}s.")
+        elif action_suggestion == "skip_scene":
+            self._log(f"  [SIMULATED] Skipping nudity scene from {start_time:.2f}s to {end_time:.2f}s. (Simulating jump)")
+            # if self.player and vlc:
+            #     self.player.set_time(int(end_time * 1000)) # Jump to end of scene
+            self._skip_simulation_to(end_time, current_playback_time)
+        else:
+            self._log(f"  [SIMULATED] Nudity detected, suggested action: {action_suggestion}")
+
+    def _apply_violence(self, action, action_suggestion, start_time, end_time, current_playback_time):
+        """Simulates the skip/mute action for a violence detection."""
+        if action_suggestion == "skip_scene":
+            self._log(f"  [SIMULATED] Skipping violence scene from {start_time:.2f}s to {end_time:.2f}s. (Simulating jump)")
+            self._skip_simulation_to(end_time, current_playback_time)
+        elif action_suggestion == "mute_audio":
+            self._log(f"  [SIMULATED] Muting audio for violence from {start_time:.2f}s to {end_time:.2f}s.")
+        else:
+            self._log(f"  [SIMULATED] Violence detected, suggested action: {action_suggestion}")
+
+    def _apply_unknown(self, action, action_suggestion, start_time, end_time, current_playback_time):
+        """Logs an action type that has no handler."""
+        self._log(f"  [SIMULATED] Unknown action type: {action.get('type')}")
+
+    # Action type -> handler; add an entry here to support a new action type
+    _ACTION_HANDLERS = {
+        "profanity_mute": _apply_profanity,
+        "nudity_detection": _apply_nudity,
+        "violence_detection": _apply_violence,
+    }
+
 
     def stop(self):
         """Stops media playback (simulated)."""
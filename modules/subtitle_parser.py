@@ -1,13 +1,110 @@
 # CleanMedia/modules/subtitle_parser.py
 
+import concurrent.futures
+import copy
+import hashlib
+import pickle
 import srt
 import json
-import re
 import os
+import tempfile
+
+from modules.config_manager import (get_profanity_regex, compile_ascii_profanity_regex,
+                                    get_profanity_automaton, get_profanity_prefilter, ensure_dir,
+                                    list_dir_names)
+
+# Below this size parsing is about as fast as loading a cached pickle
+SUBTITLE_CACHE_MIN_BYTES = 32 * 1024
 
 # No need to load_filters here, it will be passed from metadata_builder
 
-def parse_and_filter_subtitles(subtitle_path, filters, log_callback=None):
+# Anything that can go wrong reading back a missing, truncated or incompatible cache file
+_CACHE_READ_ERRORS = (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError, ImportError)
+
+def _subtitle_cache_key(subtitle_path):
+    """Returns the cache file name prefix for a subtitle file: a hash of its absolute path."""
+    return hashlib.sha1(os.path.abspath(subtitle_path).encode('utf-8', 'surrogateescape')).hexdigest()
+
+def load_subtitles(subtitle_path, cache_dir=None):
+    """
+    Parses an SRT file into srt.Subtitle objects. When cache_dir is given, files of at
+    least SUBTITLE_CACHE_MIN_BYTES are cached there as pickles whose names carry the
+    file's modification time and size, so an unchanged file is not parsed again and a
+    stale cache file is never opened. Otherwise the file is parsed lazily.
+    The subtitles are fresh objects on every call and may be modified.
+    Raises FileNotFoundError if the file does not exist.
+    """
+    st = os.stat(subtitle_path)
+    if cache_dir is None or st.st_size < SUBTITLE_CACHE_MIN_BYTES:
+        with open(subtitle_path, 'r', encoding='utf-8') as f:
+            return srt.parse(f.read())
+
+    key = _subtitle_cache_key(subtitle_path)
+    cache_name = f"{key}-{st.st_mtime_ns}-{st.st_size}.pickle"
+    cache_path = os.path.join(cache_dir, cache_name)
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except _CACHE_READ_ERRORS:
+        pass # Missing, corrupt or written by an incompatible srt version: parse the file
+
+    with open(subtitle_path, 'r', encoding='utf-8') as f:
+        subtitles = list(srt.parse(f.read()))
+    tmp_path = None
+    try:
+        ensure_dir(cache_dir)
+        with tempfile.NamedTemporaryFile(dir=cache_dir, suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            pickle.dump(subtitles, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+        # Drop the caches of earlier versions of this file
+        for name in list_dir_names(cache_dir):
+            if name.startswith(key + '-') and name != cache_name:
+                os.remove(os.path.join(cache_dir, name))
+    except (OSError, pickle.PicklingError):
+        pass # A failed write only costs the next run a parse
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return subtitles
+
+def _is_word_char(char):
+    """Matches the regex \\w class used by the \\b boundaries of the profanity pattern."""
+    return char.isalnum() or char == '_'
+
+def _find_profanity_spans(text, automaton):
+    """
+    Finds profanity in ASCII text with one Aho-Corasick pass and returns (start, end)
+    spans, choosing the same matches as the compiled regex: whole words only, leftmost
+    first, longest word at each position, no overlaps. Only ASCII text lowercases the
+    way re.IGNORECASE folds it (which also matches e.g. U+017F against 's'), so callers
+    search other text with the regex.
+    """
+    text_lower = text.lower()
+    length = len(text)
+    candidates = []
+    for end_index, word_length in automaton.iter(text_lower):
+        start = end_index - word_length + 1
+        end = end_index + 1
+        # Same test as \b on both sides of the word
+        if (start > 0 and _is_word_char(text[start - 1])) == _is_word_char(text[start]):
+            continue
+        if (end < length and _is_word_char(text[end])) == _is_word_char(text[end - 1]):
+            continue
+        candidates.append((start, -word_length))
+    candidates.sort()
+
+    spans = []
+    position = 0
+    for start, negative_length in candidates:
+        if start >= position:
+            position = start - negative_length
+            spans.append((start, position))
+    return spans
+
+def parse_and_filter_subtitles(subtitle_path, filters, log_callback=None, profanity_regex=None,
+                               profanity_automaton=None, keep_originals=True, cache_dir=None):
     """
     Parses an SRT file and filters content based on profanity settings.
 
@@ -15,6 +112,20 @@ def parse_and_filter_subtitles(subtitle_path, filters, log_callback=None):
         subtitle_path (str): Path to the input SRT file.
         filters (dict): Dictionary containing filter settings (profanity, nudity, violence).
         log_callback (callable, optional): Function to call for logging messages to GUI.
+        profanity_regex (re.Pattern, optional): Precompiled profanity pattern from
+            compile_profanity_regex(); get_profanity_regex() is used when not given.
+            A given pattern is used for every cue the automaton does not handle, in
+            place of the word-list prefilter and ASCII fast paths.
+        profanity_automaton (ahocorasick.Automaton, optional): Automaton from
+            compile_profanity_automaton(). When given, each cue is scanned for all
+            words in one pass instead of through the regex alternation; non-ASCII cues
+            still go through the regex. If neither pattern nor automaton is given,
+            get_profanity_automaton() is tried first.
+        keep_originals (bool, optional): Build the list of unfiltered subtitles. Callers
+            that only need the filtered subtitles or the actions can pass False, in
+            which case the first returned list is empty.
+        cache_dir (str, optional): Directory for load_subtitles() to cache parsed
+            subtitles in. Not cached when None.
 
     Returns:
         tuple: A tuple containing:
@@ -43,10 +154,8 @@ def parse_and_filter_subtitles(subtitle_path, filters, log_callback=None):
         log("Profanity filter is disabled. Subtitles will not be modified for profanity.")
         # If profanity filter is off, just return original subtitles as filtered
         try:
-            with open(subtitle_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                loaded_subs = list(srt.parse(content))
-                return loaded_subs, loaded_subs, []
+            loaded_subs = list(load_subtitles(subtitle_path, cache_dir))
+            return loaded_subs, loaded_subs, []
         except FileNotFoundError:
             log(f"Error: Subtitle file not found at {subtitle_path}")
             return [], [], []
@@ -58,10 +167,8 @@ def parse_and_filter_subtitles(subtitle_path, filters, log_callback=None):
     if not word_list:
         log("Profanity filter is enabled but word list is empty. No words to filter.")
         try:
-            with open(subtitle_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                loaded_subs = list(srt.parse(content))
-                return loaded_subs, loaded_subs, []
+            loaded_subs = list(load_subtitles(subtitle_path, cache_dir))
+            return loaded_subs, loaded_subs, []
         except FileNotFoundError:
             log(f"Error: Subtitle file not found at {subtitle_path}")
             return [], [], []
@@ -70,37 +177,67 @@ def parse_and_filter_subtitles(subtitle_path, filters, log_callback=None):
             return [], [], []
 
 
-    # Create a regex pattern for faster matching, case-insensitive, whole words
-    # Sort by length descending to handle "hot" before "hotdog" if both are in list
-    word_list_sorted = sorted(word_list, key=len, reverse=True)
-    # Using \b for word boundaries. For example, "hell" will not match "hello".
-    pattern = r'\b(' + '|'.join(re.escape(word) for word in word_list_sorted) + r')\b'
-    profanity_regex = re.compile(pattern, re.IGNORECASE)
+    # Prefer the Aho-Corasick automaton (cached per word list, None without pyahocorasick);
+    # otherwise a single case-insensitive, whole-word alternation matches every word in one
+    # pass. With an automaton the regex is only needed for cues the automaton cannot handle.
+    regex_given = profanity_regex is not None
+    if profanity_regex is None and profanity_automaton is None:
+        profanity_automaton = get_profanity_automaton(filters)
+        if profanity_automaton is None:
+            profanity_regex = get_profanity_regex(filters)
 
-    try:
-        with open(subtitle_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        loaded_subs = list(srt.parse(content))
+    # The fast paths below are built from the word list, so they are skipped when the
+    # caller passed its own pattern, which may match different words
+    prefilter_search = ascii_regex = single_word = None
+    if not regex_given:
+        # Cues without any of the words' first characters are passed through unsearched
+        profanity_prefilter = get_profanity_prefilter(filters)
+        if profanity_prefilter is not None:
+            prefilter_search = profanity_prefilter.search
+        # ASCII cues are lowercased once and searched without case folding
+        ascii_regex = compile_ascii_profanity_regex(word_list)
+        # With a single word, a plain substring test rules out most ASCII cues before any regex runs
+        lowered_words = {word.lower() for word in word_list}
+        if ascii_regex is not None and len(lowered_words) == 1:
+            single_word = lowered_words.pop()
 
-        for sub in loaded_subs:
-            original_subtitles.append(sub)
+    try:
+        # Consume the parser lazily; only the output lists hold the subtitles
+        for sub in load_subtitles(subtitle_path, cache_dir):
             current_filtered_text = sub.content # Start with original content for this subtitle
             
-            # Find all matches in the current subtitle content
-            matches = list(profanity_regex.finditer(current_filtered_text))
+            # Find all matches in the current subtitle content as (start, end) spans
+            matches = None
+            if single_word is not None and current_filtered_text.isascii():
+                text_lower = current_filtered_text.lower()
+                matches = [match.span() for match in ascii_regex.finditer(text_lower)] if single_word in text_lower else ()
+            elif prefilter_search is not None and prefilter_search(current_filtered_text) is None:
+                matches = ()
+            elif profanity_automaton is not None and current_filtered_text.isascii():
+                matches = _find_profanity_spans(current_filtered_text, profanity_automaton)
+            if matches is None:
+                if ascii_regex is not None and current_filtered_text.isascii():
+                    # Lowercasing ASCII keeps every offset, so the spans apply to the original text
+                    matches = [match.span() for match in ascii_regex.finditer(current_filtered_text.lower())]
+                else:
+                    if profanity_regex is None:
+                        profanity_regex = get_profanity_regex(filters)
+                    matches = [match.span() for match in profanity_regex.finditer(current_filtered_text)]
 
             if matches:
-                # To correctly replace multiple occurrences without messing up indices,
-                # it's often easier to build the new string or replace in one go using sub().
+                # The spans from the single search pass drive both the actions and the
+                # replacement, so the text is not scanned a second time by sub().
                 # Record actions first based on original text.
-                for match in matches:
-                    matched_word = match.group(0)
+                # Convert the cue times once; every match in the cue shares them
+                start_seconds = sub.start.total_seconds()
+                end_seconds = sub.end.total_seconds()
+                for match_start, match_end in matches:
+                    matched_word = current_filtered_text[match_start:match_end]
                     
                     actions.append({
                         "type": "profanity_mute", # Naming convention for action type
-                        "start_time": sub.start.total_seconds(),
-                        "end_time": sub.end.total_seconds(),
+                        "start_time": start_seconds,
+                        "end_time": end_seconds,
                         "original_text": sub.content,
                         "matched_word": matched_word,
                         "action_taken": f"replaced '{matched_word}' with '{replace_with}'",
@@ -109,19 +246,24 @@ def parse_and_filter_subtitles(subtitle_path, filters, log_callback=None):
                 
                 # Perform the replacement on the text that will be used for the filtered subtitle
                 # This replaces all matched words in the current subtitle's content
-                current_filtered_text = profanity_regex.sub(replace_with, current_filtered_text)
+                pieces = []
+                position = 0
+                for match_start, match_end in matches:
+                    pieces.append(current_filtered_text[position:match_start])
+                    pieces.append(replace_with)
+                    position = match_end
+                pieces.append(current_filtered_text[position:])
+                current_filtered_text = "".join(pieces)
                 
-                # Create a new subtitle object with the modified text
-                filtered_subtitles.append(srt.Subtitle(
-                    index=sub.index,
-                    start=sub.start,
-                    end=sub.end,
-                    content=current_filtered_text,
-                    proprietary=sub.proprietary
-                ))
-            else:
+                # Keep a shallow copy with the original text, then filter the parsed
+                # subtitle in place rather than constructing a new srt.Subtitle
+                if keep_originals:
+                    original_subtitles.append(copy.copy(sub))
+                sub.content = current_filtered_text
+            elif keep_originals:
                 # If no profanity, keep the subtitle as is
-                filtered_subtitles.append(sub)
+                original_subtitles.append(sub)
+            filtered_subtitles.append(sub)
 
     except FileNotFoundError:
         log(f"Error: Subtitle file not found at {subtitle_path}")
@@ -133,7 +275,10 @@ def parse_and_filter_subtitles(subtitle_path, filters, log_callback=None):
     return original_subtitles, filtered_subtitles, actions
 
 def save_filtered_subtitles(subtitles, output_path, log_callback=None):
-    """Saves a list of srt.Subtitle objects to an SRT file."""
+    """
+    Saves srt.Subtitle objects (any iterable) to an SRT file. Blocks are
+    written one at a time instead of composing the whole file into one string.
+    """
     def log(message):
         if log_callback:
             log_callback(message)
@@ -141,11 +286,62 @@ def save_filtered_subtitles(subtitles, output_path, log_callback=None):
             print(message)
     try:
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(srt.compose(subtitles))
+            # Same output as srt.compose(), which sorts and reindexes by start time
+            f.writelines(subtitle.to_srt() for subtitle in srt.sort_and_reindex(subtitles))
         log(f"Filtered subtitles saved to {output_path}")
     except Exception as e:
         log(f"Error saving filtered subtitles: {e}")
 
+def _filter_batch_item(subtitle_path, filters, options):
+    """Runs parse_and_filter_subtitles in a worker, collecting its log lines instead of using a callback."""
+    logs = []
+    result = parse_and_filter_subtitles(subtitle_path, filters, log_callback=logs.append, **options)
+    return result, logs
+
+def parse_and_filter_subtitles_batch(subtitle_paths, filters, max_workers=None, log_callback=None, **options):
+    """
+    Parses and filters several SRT files in parallel worker processes.
+    Files are independent, so each path is a separate parse_and_filter_subtitles
+    job; the profanity matchers are compiled once per worker from the filters.
+
+    Args:
+        subtitle_paths (iterable): Paths to the input SRT files.
+        filters (dict): Dictionary containing filter settings, shared by every file.
+        max_workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        log_callback (callable, optional): Receives each job's log lines as that job completes.
+        **options: Further parse_and_filter_subtitles keyword arguments (e.g. keep_originals).
+
+    Returns:
+        list: The (original, filtered, actions) tuples in input order; ([], [], []) for a job that failed.
+    """
+    def log(message):
+        if log_callback:
+            log_callback(message)
+        else:
+            print(message)
+
+    subtitle_paths = list(subtitle_paths)
+    if not subtitle_paths:
+        return []
+
+    results = [([], [], []) for _ in subtitle_paths]
+    workers = min(max_workers or os.cpu_count() or 1, len(subtitle_paths))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_filter_batch_item, subtitle_path, filters, options): index
+            for index, subtitle_path in enumerate(subtitle_paths)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            try:
+                results[index], logs = future.result()
+            except Exception as e:
+                log(f"Error filtering subtitles {subtitle_paths[index]}: {e}")
+                continue
+            for message in logs:
+                log(message)
+    return results
+
 if __name__ == '__main__':
     # Example usage for testing this module
     dummy_subtitle_content = """
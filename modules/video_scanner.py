@@ -4,10 +4,32 @@ import cv2
 import json
 import os
 import random # For more varied simulation
+from bisect import bisect_right
+from operator import itemgetter
 # from tensorflow.keras.models import load_model # Example for AI model
 
 # No need to load_filters here, it will be passed from metadata_builder
 
+# Probed video properties keyed by path, stored as ((st_mtime_ns, st_size), (fps, frame_count))
+_VIDEO_PROPERTIES_CACHE = {}
+
+def _probe_video_properties(video_path, signature):
+    """
+    Returns (fps, frame_count) of a video read through cv2.VideoCapture, or None if it
+    cannot be opened. The previous probe is reused while the file's stat signature
+    (modification time and size) is unchanged, since opening the container is slow.
+    """
+    hit = _VIDEO_PROPERTIES_CACHE.get(video_path)
+    if hit is not None and hit[0] == signature:
+        return hit[1]
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    properties = (cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    cap.release() # Release it after getting properties, we don't need to read frames for simulation logic
+    _VIDEO_PROPERTIES_CACHE[video_path] = (signature, properties)
+    return properties
+
 def scan_video_for_content(video_path, filters, log_callback=None):
     """
     Scans a video file for nudity and violence using (placeholder) AI models.
@@ -59,29 +81,33 @@ def scan_video_for_content(video_path, filters, log_callback=None):
     #     nudity_model = None
     #     violence_model = None
 
+    # One stat answers both the existence and the placeholder-size check
+    try:
+        st = os.stat(video_path)
+    except OSError:
+        st = None
+
     # Simulate video capture if the file doesn't exist or is a placeholder
-    if not os.path.exists(video_path) or os.path.getsize(video_path) < 100: # Small size implies placeholder
+    if st is None or st.st_size < 100: # Small size implies placeholder
         log(f"Warning: Video file {video_path} is missing or a placeholder. Simulating video properties.")
         fps = 25 # Simulated FPS
         frame_count = 25 * 60 # Simulate a 60-second video
     else:
         # For actual video files, use opencv-python to get properties
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
+        properties = _probe_video_properties(video_path, (st.st_mtime_ns, st.st_size))
+        if properties is None:
             log(f"Error: Could not open video file {video_path}. Simulating video properties.")
             fps = 25
             frame_count = 25 * 60
         else:
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            cap.release() # Release it after getting properties, we don't need to read frames for simulation logic
+            fps, frame_count = properties
     
     if fps == 0: # Avoid division by zero if FPS is improperly read/simulated
         fps = 25
 
     log(f"Simulated Video Properties: FPS: {fps}, Total Frames: {frame_count}")
 
-    frame_interval = int(fps) # Process one frame per second for simulation, or adjust as needed
+    frame_interval = max(1, int(fps)) # Process one frame per second for simulation, or adjust as needed
 
     # Simulate detection based on time segments for demonstration
     simulated_events = [
@@ -92,47 +118,57 @@ def scan_video_for_content(video_path, filters, log_callback=None):
         {"start_s": 30, "end_s": 35, "type": "violence", "confidence_base": 0.95},
         {"start_s": 50, "end_s": 53, "type": "violence", "confidence_base": 0.85},
     ]
-
-    for i in range(frame_count):
-        # Process frames at a reduced interval to simulate processing power
-        if i % frame_interval == 0:
-            current_time_seconds = i / fps
-            
-            simulated_nudity_score = 0.0
-            simulated_violence_score = 0.0
-
-            # Check if current time falls into any simulated event
-            for event in simulated_events:
-                if event['start_s'] <= current_time_seconds < event['end_s']:
-                    # Add some randomness to confidence for realism
-                    confidence = event['confidence_base'] + random.uniform(-0.05, 0.05)
-                    confidence = max(0.0, min(1.0, confidence)) # Clamp between 0 and 1
-                    
-                    if event['type'] == "nudity":
-                        simulated_nudity_score = confidence
-                    elif event['type'] == "violence":
-                        simulated_violence_score = confidence
-            
-            if nudity_enabled and simulated_nudity_score >= nudity_threshold:
-                actions.append({
-                    "type": "nudity_detection",
-                    "start_time": current_time_seconds,
-                    "end_time": current_time_seconds + 1, # Assume 1 second duration for simplicity
-                    "confidence": simulated_nudity_score,
-                    "action_suggestion": nudity_action # Use action from filters
-                })
-                log(f"  Detected nudity at {current_time_seconds:.2f}s (Score: {simulated_nudity_score:.2f})")
-
-            if violence_enabled and simulated_violence_score >= violence_threshold:
-                actions.append({
-                    "type": "violence_detection",
-                    "start_time": current_time_seconds,
-                    "end_time": current_time_seconds + 1, # Assume 1 second duration
-                    "confidence": simulated_violence_score,
-                    "action_suggestion": violence_action # Use action from filters
-                })
-                log(f"  Detected violence at {current_time_seconds:.2f}s (Score: {simulated_violence_score:.2f})")
-
+    # Sorted by start so each sample only looks at the events that have begun by then
+    simulated_events.sort(key=itemgetter('start_s'))
+    event_starts = [event['start_s'] for event in simulated_events]
+    first_active = 0 # Events before this one have ended; samples only move forward in time
+
+    # Detection lines are logged together after the scan rather than one log call per sample
+    detection_lines = []
+
+    # Step straight from one sampled frame to the next instead of visiting every frame index
+    for i in range(0, frame_count, frame_interval):
+        current_time_seconds = i / fps
+        
+        simulated_nudity_score = 0.0
+        simulated_violence_score = 0.0
+
+        # Check if current time falls into any simulated event
+        while first_active < len(simulated_events) and simulated_events[first_active]['end_s'] <= current_time_seconds:
+            first_active += 1
+        for event in simulated_events[first_active:bisect_right(event_starts, current_time_seconds)]:
+            if current_time_seconds < event['end_s']:
+                # Add some randomness to confidence for realism
+                confidence = event['confidence_base'] + random.uniform(-0.05, 0.05)
+                confidence = max(0.0, min(1.0, confidence)) # Clamp between 0 and 1
+                
+                if event['type'] == "nudity":
+                    simulated_nudity_score = confidence
+                elif event['type'] == "violence":
+                    simulated_violence_score = confidence
+        
+        if nudity_enabled and simulated_nudity_score >= nudity_threshold:
+            actions.append({
+                "type": "nudity_detection",
+                "start_time": current_time_seconds,
+                "end_time": current_time_seconds + 1, # Assume 1 second duration for simplicity
+                "confidence": simulated_nudity_score,
+                "action_suggestion": nudity_action # Use action from filters
+            })
+            detection_lines.append(f"  Detected nudity at {current_time_seconds:.2f}s (Score: {simulated_nudity_score:.2f})")
+
+        if violence_enabled and simulated_violence_score >= violence_threshold:
+            actions.append({
+                "type": "violence_detection",
+                "start_time": current_time_seconds,
+                "end_time": current_time_seconds + 1, # Assume 1 second duration
+                "confidence": simulated_violence_score,
+                "action_suggestion": violence_action # Use action from filters
+            })
+            detection_lines.append(f"  Detected violence at {current_time_seconds:.2f}s (Score: {simulated_violence_score:.2f})")
+
+    if detection_lines:
+        log("\n".join(detection_lines))
     log(f"Finished video scanning. Found {len(actions)} potential issues.")
     return actions
 